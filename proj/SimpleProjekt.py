@@ -1,125 +1,28 @@
 '''@package docstring
 '''
 
+import sys
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 
-class Cache:
-    """ Class implementing a simple LRU cache """
-    
-    class Node:
-        """ Node for doubly linked list """
-        def __init__(self, value):
-            self.value = value
-            self.next = None
-            self.prev = None
-
-    class Queue:
-        """ Doubly linked list implementation for LRU queue """
-    
-        def __init__(self):
-            self.head = None
-            self.tail = None
-
-        def append(self, value):
-            new_node = Cache.Node(value)
-            if not self.head:
-                self.head = new_node
-                self.tail = new_node
-            else:
-                self.tail.next = new_node
-                new_node.prev = self.tail
-                self.tail = new_node
-            return new_node
-
-        def pop_head(self):
-            if not self.head:
-                return None
-            node = self.head
-            self.head = self.head.next
-            if self.head:
-                self.head.prev = None
-            else:
-                self.tail = None
-            return node.value
-        
-        def pop(self, node):
-            if not node:
-                return None
-            if node.prev:
-                node.prev.next = node.next
-            else:
-                self.head = node.next
-            if node.next:
-                node.next.prev = node.prev
-            else:
-                self.tail = node.prev
-            return node.value
-        
-        def to_list(self):
-            elements = []
-            current = self.head
-            while current:
-                elements.append(current.value)
-                current = current.next
-            return elements
-
-    def __init__(self, size):
-        self.size = size
-        self.cache = dict()
-        self.queue = self.Queue()
-        self.hits = 0
-        self.misses = 0
-
-    def write(self, value):
-        if value in self.cache:
-            self.hits += 1
-            old_node = self.cache[value]
-            self.queue.pop(old_node)
-            new_node = self.queue.append(value)
-            self.cache[value] = new_node
-            return True 
-        
-        self.misses += 1
-        if len(self.cache) >= self.size:
-            oldest = self.queue.pop_head()
-            self.cache.pop(oldest)
-        
-        new_node = self.queue.append(value)
-        self.cache[value] = new_node
-        return False
-
-    def read(self, value):
-        if value in self.cache:
-            self.hits += 1
-            old_node = self.cache[value]
-            self.queue.pop(old_node)
-            new_node = self.queue.append(value)
-            self.cache[value] = new_node
-            return True
-        
-        self.misses += 1
-        return False
-
-    def get_elements(self):
-        return self.queue.to_list()
-
-    def reset(self):
-        self.cache = dict()
-        self.queue = self.Queue()
-        self.hits = 0
-        self.misses = 0
-
+from events import EVICT, PROMOTE, observe
+from policy import DEFAULT_POLICY, make_cache, resize_cache
 
 class CacheGUI:
-    def __init__(self, master):
+    def __init__(self, master, policy=DEFAULT_POLICY):
         self.master = master
+        self.policy = policy
         master.title("LRU Cache Simulator")
         master.geometry("600x500")
         
         # Cache size
         self.cache_size = 5
-        self.cache = Cache(self.cache_size)
+        self.cache = make_cache(self.policy, self.cache_size)
+        self.observed = observe(self.cache, self.on_cache_event)
+        
+        # Displayed values: value -> text tag, one tag per value
+        self.tags = dict()
+        self.serial = 0
         
         # Cache size frame
         size_frame = tk.Frame(master)
@@ -168,16 +71,21 @@ class CacheGUI:
         self.misses_label = tk.Label(stats_frame, text="MISSES: 0", font=("Arial", 10))
         self.misses_label.pack()
         
-        self.update_display()
+        self.update_display(rebuild=True)
     
     def change_size(self):
         new_size = simpledialog.askinteger("Rozmiar cache", "Podaj nowy rozmiar (1-20):", 
                                            initialvalue=self.cache_size, minvalue=1, maxvalue=20)
         if new_size:
             self.cache_size = new_size
-            self.cache = Cache(self.cache_size)
+            cache = resize_cache(self.cache, self.policy, self.cache_size)
             self.size_label.config(text=str(self.cache_size))
-            self.update_display()
+            if cache is not self.cache:
+                self.cache = cache
+                self.observed = observe(self.cache, self.on_cache_event)
+                self.update_display(rebuild=True)
+            else:
+                self.update_display()
     
     def read_value(self):
         value = self.entry.get().strip()
@@ -200,10 +108,11 @@ class CacheGUI:
         self.update_display()
     
     def reset_cache(self):
-        self.cache.reset()
+        self.cache = make_cache(self.policy, self.cache_size)
+        self.observed = observe(self.cache, self.on_cache_event)
         self.result_label.config(text="")
         self.result_frame.config(bg=self.master.cget('bg'))
-        self.update_display()
+        self.update_display(rebuild=True)
     
     def show_result(self, text, is_hit):
         self.result_label.config(text=f"Wynik: {text}")
@@ -214,25 +123,69 @@ class CacheGUI:
             self.result_frame.config(bg="#f8d7da")
             self.result_label.config(bg="#f8d7da")
     
-    def update_display(self):
-        elements = self.cache.get_elements()
-        
+    def on_cache_event(self, event, value):
+        # Edit only the part of the text of the value
         self.cache_display.config(state=tk.NORMAL)
-        self.cache_display.delete(1.0, tk.END)
         
-        if elements:
-            self.cache_display.insert(1.0, " → ".join(elements))
+        if event == PROMOTE:
+            first, last = self.cache_display.tag_ranges(self.tags[value])
+            if self.cache_display.compare(last, "!=", "end-1c"):
+                self.remove_value(value)
+                self.append_value(value)
+        elif event == EVICT:
+            self.remove_value(value)
         else:
+            self.append_value(value)
+        
+        self.cache_display.config(state=tk.DISABLED)
+    
+    def append_value(self, value):
+        if not self.tags:
+            self.cache_display.delete(1.0, tk.END)
+        
+        tag = f"value{self.serial}"
+        self.serial += 1
+        self.cache_display.insert(tk.END, (" → " if self.tags else "") + str(value), tag)
+        self.tags[value] = tag
+    
+    def remove_value(self, value):
+        tag = self.tags.pop(value)
+        first, last = self.cache_display.tag_ranges(tag)
+        at_start = self.cache_display.compare(first, "==", 1.0)
+        self.cache_display.delete(first, last)
+        self.cache_display.tag_delete(tag)
+        
+        if not self.tags:
             self.cache_display.insert(1.0, "PUSTY")
+        elif at_start:
+            # the next value is the first now, drop its arrow
+            self.cache_display.delete(1.0, "1.0+3c")
+    
+    def draw_cache(self):
+        self.cache_display.config(state=tk.NORMAL)
+        self.cache_display.delete(1.0, tk.END)
+        
+        for tag in self.tags.values():
+            self.cache_display.tag_delete(tag)
+        self.tags.clear()
+        
+        self.cache_display.insert(1.0, "PUSTY")
+        for value in self.cache.get_elements():
+            self.append_value(value)
         
         self.cache_display.config(state=tk.DISABLED)
+    
+    def update_display(self, rebuild=False):
+        # Engines with cache events keep the text up to date by themselves
+        if rebuild or not self.observed:
+            self.draw_cache()
         
-        self.capacity_label.config(text=f"Pojemność: {len(elements)} / {self.cache_size}")
+        self.capacity_label.config(text=f"Pojemność: {len(self.tags)} / {self.cache_size}")
         self.hits_label.config(text=f"HITS: {self.cache.hits}")
         self.misses_label.config(text=f"MISSES: {self.cache.misses}")
 
 
 if __name__ == "__main__":
     root = tk.Tk()
-    gui = CacheGUI(root)
+    gui = CacheGUI(root, sys.argv[1] if len(sys.argv) > 1 else DEFAULT_POLICY)
     root.mainloop()
\ No newline at end of file
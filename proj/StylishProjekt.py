@@ -1,116 +1,14 @@
 '''@package docstring
 '''
 
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
 
-class Cache:
-    """ Class implementing a simple LRU cache """
-    
-    class Node:
-        """ Node for doubly linked list """
-        def __init__(self, value):
-            self.value = value
-            self.next = None
-            self.prev = None
-
-    class Queue:
-        """ Doubly linked list implementation for LRU queue """
-    
-        def __init__(self):
-            self.head = None
-            self.tail = None
-
-        def append(self, value):
-            new_node = Cache.Node(value)
-            if not self.head:
-                self.head = new_node
-                self.tail = new_node
-            else:
-                self.tail.next = new_node
-                new_node.prev = self.tail
-                self.tail = new_node
-            return new_node
-
-        def pop_head(self):
-            if not self.head:
-                return None
-            node = self.head
-            self.head = self.head.next
-            if self.head:
-                self.head.prev = None
-            else:
-                self.tail = None
-            return node.value
-        
-        def pop(self, node):
-            if not node:
-                return None
-            if node.prev:
-                node.prev.next = node.next
-            else:
-                self.head = node.next
-            if node.next:
-                node.next.prev = node.prev
-            else:
-                self.tail = node.prev
-            return node.value
-        
-        def to_list(self):
-            elements = []
-            current = self.head
-            while current:
-                elements.append(current.value)
-                current = current.next
-            return elements
-
-    def __init__(self, size):
-        self.size = size
-        self.cache = dict()
-        self.queue = self.Queue()
-        self.hits = 0
-        self.misses = 0
-
-    def write(self, value):
-        if value in self.cache:
-            self.hits += 1
-            old_node = self.cache[value]
-            self.queue.pop(old_node)
-            new_node = self.queue.append(value)
-            self.cache[value] = new_node
-            return True 
-        
-        self.misses += 1
-        if len(self.cache) >= self.size:
-            oldest = self.queue.pop_head()
-            self.cache.pop(oldest)
-        
-        new_node = self.queue.append(value)
-        self.cache[value] = new_node
-        return False
-
-    def read(self, value):
-        if value in self.cache:
-            self.hits += 1
-            old_node = self.cache[value]
-            self.queue.pop(old_node)
-            new_node = self.queue.append(value)
-            self.cache[value] = new_node
-            return True
-        
-        self.misses += 1
-        return False
-
-    def get_elements(self):
-        return self.queue.to_list()
-
-    def reset(self):
-        self.cache = dict()
-        self.queue = self.Queue()
-        self.hits = 0
-        self.misses = 0
-
+from cache_view import CacheView
+from events import observe
+from policy import DEFAULT_POLICY, make_cache, resize_cache
 
 class ModernButton(tk.Canvas):
     """Custom gradient button"""
@@ -157,16 +55,60 @@ class ModernButton(tk.Canvas):
         self.draw_button()
 
 
+class StripView(CacheView):
+    """Row of cache boxes from LRU to MRU, moved by cache events"""
+    def __init__(self, canvas, size):
+        x_start = 20
+        y = 30
+        box_width = 70
+        box_height = 50
+        gap = 15
+        
+        super().__init__(canvas, size, size, x_start, y, box_width, box_height, gap, 0)
+    
+    def draw_empty(self):
+        self.canvas.create_text(
+            self.canvas.winfo_width() // 2 or 150,
+            self.canvas.winfo_height() // 2 or 50,
+            text="EMPTY CACHE", fill="#666666", font=("Segoe UI", 14, "bold"),
+            tags="empty"
+        )
+    
+    def draw_slot(self, index, x, y):
+        # Gradient color from old to new
+        intensity = int(100 + (155 * index / max(self.size - 1, 1)))
+        color = f"#{intensity:02x}{intensity//2:02x}{255:02x}"
+        
+        # Draw box
+        self.canvas.create_rectangle(x, y, x + self.box_width, y + self.box_height,
+                                     fill=color, outline="#ffffff", width=2,
+                                     tags=f"slot{index}")
+        
+        # Label
+        label = "LRU" if index == 0 else "MRU"
+        self.canvas.create_text(x + self.box_width // 2, y + self.box_height + 15,
+                                text=label, fill="#00d4ff",
+                                font=("Segoe UI", 8, "bold"),
+                                tags=f"slot{index}" if index == 0 else f"mru{index}")
+    
+    def draw_value(self, x, y, text, tags):
+        self.canvas.create_text(x, y, text=text, fill="white",
+                                font=("Segoe UI", 14, "bold"), tags=tags)
+
+
 class CacheGUI:
-    def __init__(self, master):
+    def __init__(self, master, policy=DEFAULT_POLICY):
         self.master = master
+        self.policy = policy
         master.title("LRU Cache Simulator Pro")
         master.geometry("900x700")
         master.configure(bg="#1a1a2e")
         
         # Cache
         self.cache_size = 5
-        self.cache = Cache(self.cache_size)
+        self.cache = make_cache(self.policy, self.cache_size)
+        self.observed = observe(self.cache, self.on_cache_event)
+        self.view = None
         self.history = []
         
         # Style
@@ -311,16 +253,18 @@ class CacheGUI:
         self.history_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.config(command=self.history_list.yview)
         
-        self.update_display()
+        self.update_display(rebuild=True)
     
     def on_size_change(self, value):
         new_size = int(value)
         if new_size != self.cache_size:
             self.cache_size = new_size
-            self.cache = Cache(self.cache_size)
-            self.history.clear()
-            self.history_list.delete(0, tk.END)
-            self.update_display()
+            cache = resize_cache(self.cache, self.policy, self.cache_size)
+            if cache is not self.cache:
+                self.cache = cache
+                self.observed = observe(self.cache, self.on_cache_event)
+            # Boxes and colors follow the size
+            self.update_display(rebuild=True)
     
     def read_value(self):
         value = self.entry.get().strip()
@@ -345,12 +289,13 @@ class CacheGUI:
         self.update_display()
     
     def reset_cache(self):
-        self.cache.reset()
+        self.cache = make_cache(self.policy, self.cache_size)
+        self.observed = observe(self.cache, self.on_cache_event)
         self.history.clear()
         self.history_list.delete(0, tk.END)
         self.result_label.config(text="Cache reset!", fg="#ffffff")
         self.result_frame.config(bg="#0f3460")
-        self.update_display()
+        self.update_display(rebuild=True)
     
     def show_result(self, text, is_hit):
         result_text = f"{text} → {'HIT' if is_hit else 'MISS'}"
@@ -368,49 +313,22 @@ class CacheGUI:
         entry = f"[{time}] {operation} '{value}' → {'HIT' if result else 'MISS'}"
         self.history_list.insert(0, entry)
     
-    def update_display(self):
-        # Update cache visualization
-        elements = self.cache.get_elements()
-        self.cache_canvas.delete("all")
-        
-        if not elements:
-            self.cache_canvas.create_text(
-                self.cache_canvas.winfo_width() // 2 or 150,
-                self.cache_canvas.winfo_height() // 2 or 50,
-                text="EMPTY CACHE", fill="#666666", font=("Segoe UI", 14, "bold")
-            )
-        else:
-            x_start = 20
-            y = 30
-            box_width = 70
-            box_height = 50
-            gap = 15
-            
-            for i, elem in enumerate(elements):
-                x = x_start + i * (box_width + gap)
-                
-                # Gradient color from old to new
-                intensity = int(100 + (155 * i / max(len(elements) - 1, 1)))
-                color = f"#{intensity:02x}{intensity//2:02x}{255:02x}"
-                
-                # Draw box
-                self.cache_canvas.create_rectangle(x, y, x + box_width, y + box_height,
-                                                  fill=color, outline="#ffffff", width=2)
-                
-                # Draw value
-                self.cache_canvas.create_text(x + box_width // 2, y + box_height // 2,
-                                             text=str(elem), fill="white",
-                                             font=("Segoe UI", 14, "bold"))
-                
-                # Label
-                label = "LRU" if i == 0 else "MRU" if i == len(elements) - 1 else ""
-                if label:
-                    self.cache_canvas.create_text(x + box_width // 2, y + box_height + 15,
-                                                 text=label, fill="#00d4ff",
-                                                 font=("Segoe UI", 8, "bold"))
+    def on_cache_event(self, event, value):
+        # Move only the boxes touched by a cache operation
+        self.view.on_event(event, value)
+    
+    def draw_cache(self):
+        # Rebuild the whole cache visualization
+        self.view = StripView(self.cache_canvas, self.cache_size)
+        self.view.fill(self.cache.get_elements())
+    
+    def update_display(self, rebuild=False):
+        # Engines with cache events keep the canvas up to date by themselves
+        if rebuild or not self.observed:
+            self.draw_cache()
         
         # Update labels
-        self.capacity_label.config(text=f"Capacity: {len(elements)} / {self.cache_size}")
+        self.capacity_label.config(text=f"Capacity: {self.view.count} / {self.cache_size}")
         self.hits_label.config(text=str(self.cache.hits))
         self.misses_label.config(text=str(self.cache.misses))
         
@@ -425,5 +343,5 @@ class CacheGUI:
 
 if __name__ == "__main__":
     root = tk.Tk()
-    gui = CacheGUI(root)
+    gui = CacheGUI(root, sys.argv[1] if len(sys.argv) > 1 else DEFAULT_POLICY)
     root.mainloop()
\ No newline at end of file
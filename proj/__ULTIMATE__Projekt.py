@@ -2,115 +2,17 @@
 Ultra Advanced LRU Cache Simulator with insane visual effects
 '''
 
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 import math
 import random
+import time
 
-class Cache:
-    """ Class implementing a simple LRU cache """
-    
-    class Node:
-        def __init__(self, value):
-            self.value = value
-            self.next = None
-            self.prev = None
-
-    class Queue:
-        def __init__(self):
-            self.head = None
-            self.tail = None
-
-        def append(self, value):
-            new_node = Cache.Node(value)
-            if not self.head:
-                self.head = new_node
-                self.tail = new_node
-            else:
-                self.tail.next = new_node
-                new_node.prev = self.tail
-                self.tail = new_node
-            return new_node
-
-        def pop_head(self):
-            if not self.head:
-                return None
-            node = self.head
-            self.head = self.head.next
-            if self.head:
-                self.head.prev = None
-            else:
-                self.tail = None
-            return node.value
-        
-        def pop(self, node):
-            if not node:
-                return None
-            if node.prev:
-                node.prev.next = node.next
-            else:
-                self.head = node.next
-            if node.next:
-                node.next.prev = node.prev
-            else:
-                self.tail = node.prev
-            return node.value
-        
-        def to_list(self):
-            elements = []
-            current = self.head
-            while current:
-                elements.append(current.value)
-                current = current.next
-            return elements
-
-    def __init__(self, size):
-        self.size = size
-        self.cache = dict()
-        self.queue = self.Queue()
-        self.hits = 0
-        self.misses = 0
-
-    def write(self, value):
-        if value in self.cache:
-            self.hits += 1
-            old_node = self.cache[value]
-            self.queue.pop(old_node)
-            new_node = self.queue.append(value)
-            self.cache[value] = new_node
-            return True 
-        
-        self.misses += 1
-        if len(self.cache) >= self.size:
-            oldest = self.queue.pop_head()
-            self.cache.pop(oldest)
-        
-        new_node = self.queue.append(value)
-        self.cache[value] = new_node
-        return False
-
-    def read(self, value):
-        if value in self.cache:
-            self.hits += 1
-            old_node = self.cache[value]
-            self.queue.pop(old_node)
-            new_node = self.queue.append(value)
-            self.cache[value] = new_node
-            return True
-        
-        self.misses += 1
-        return False
-
-    def get_elements(self):
-        return self.queue.to_list()
-
-    def reset(self):
-        self.cache = dict()
-        self.queue = self.Queue()
-        self.hits = 0
-        self.misses = 0
-
+from cache_view import CacheView
+from events import observe
+from policy import DEFAULT_POLICY, make_cache, resize_cache
 
 class Particle:
     """Particle for background animation"""
@@ -122,9 +24,9 @@ class Particle:
         self.size = random.randint(1, 3)
         self.color = random.choice(['#ff006e', '#fb5607', '#ffbe0b', '#8338ec', '#3a86ff'])
     
-    def update(self, width, height):
-        self.x += self.vx
-        self.y += self.vy
+    def update(self, width, height, step=1):
+        self.x += self.vx * step
+        self.y += self.vy * step
         
         if self.x < 0 or self.x > width:
             self.vx *= -1
@@ -132,15 +34,107 @@ class Particle:
             self.vy *= -1
 
 
+class FrameScheduler:
+    """One after() loop driving all animations, with adaptive frame rate"""
+    BASE_FPS = 20       # animation speeds are given in frames of 20 fps
+    MIN_FPS = 5
+    MAX_FPS = 30
+    CPU_BUDGET = 0.25   # share of one core the GUI may use while animating
+    IDLE_AFTER = 30     # seconds without mouse or keyboard input before pausing
+    
+    def __init__(self, master):
+        self.master = master
+        self.animations = []
+        self.fps_target = self.BASE_FPS
+        self.clock = 0.0
+        self.job = None
+        
+        # Counters, measured over about a second
+        self.fps = 0.0
+        self.cpu_per_frame = 0.0    # ms of process CPU time per frame, redraws included
+        
+        now = time.monotonic()
+        self.last_tick = now
+        self.last_input = now
+        self.reset_window(now)
+        
+        for sequence in ("<Motion>", "<Key>", "<Button>"):
+            master.bind_all(sequence, self.wake, add="+")
+        master.bind("<Map>", self.wake, add="+")
+    
+    def add(self, animation):
+        """animation(t) is called every frame; t is the animation time in frames of BASE_FPS"""
+        self.animations.append(animation)
+    
+    def start(self):
+        if self.job is None:
+            now = time.monotonic()
+            self.last_tick = now
+            self.reset_window(now)
+            self.job = self.master.after(0, self.tick)
+    
+    @property
+    def paused(self):
+        return self.job is None
+    
+    def wake(self, event=None):
+        """Input or a restored window resumes the animations"""
+        self.last_input = time.monotonic()
+        self.start()
+    
+    def reset_window(self, now):
+        self.window_start = now
+        self.window_cpu = time.process_time()
+        self.window_frames = 0
+    
+    def tick(self):
+        self.job = None
+        now = time.monotonic()
+        
+        # Minimized or nobody around: stop until wake()
+        if self.master.state() == "iconic" or now - self.last_input > self.IDLE_AFTER:
+            self.fps = 0.0
+            return
+        
+        # Animation time stands still while paused and never jumps more than a few frames
+        self.clock += min(now - self.last_tick, 0.25) * self.BASE_FPS
+        self.last_tick = now
+        
+        for animation in self.animations:
+            animation(self.clock)
+        
+        self.window_frames += 1
+        if now - self.window_start >= 1.0:
+            self.measure(now)
+        
+        self.job = self.master.after(round(1000 / self.fps_target), self.tick)
+    
+    def measure(self, now):
+        """Update counters and adapt the frame rate to the CPU budget"""
+        elapsed = now - self.window_start
+        cpu = time.process_time() - self.window_cpu
+        self.fps = self.window_frames / elapsed
+        self.cpu_per_frame = 1000 * cpu / self.window_frames
+        
+        load = cpu / elapsed
+        if load > self.CPU_BUDGET:
+            self.fps_target = max(self.MIN_FPS, self.fps_target * self.CPU_BUDGET / load)
+        elif load < self.CPU_BUDGET / 2:
+            self.fps_target = min(self.MAX_FPS, self.fps_target * 1.25)
+        
+        self.reset_window(now)
+
+
 class AnimatedButton(tk.Canvas):
     """Ultra animated button with glow effect"""
-    def __init__(self, parent, text, command, gradient_colors, **kwargs):
+    def __init__(self, parent, text, command, gradient_colors, scheduler, **kwargs):
         super().__init__(parent, **kwargs)
         self.command = command
         self.text = text
         self.colors = gradient_colors
         self.is_hover = False
-        self.animation_frame = 0
+        self.hover_start = None
+        self.pulse = None
         self.pulse_size = 0
         
         self.config(width=140, height=50, highlightthickness=0, bd=0, bg='#0a0e27')
@@ -150,7 +144,7 @@ class AnimatedButton(tk.Canvas):
         self.bind("<Enter>", self.on_enter)
         self.bind("<Leave>", self.on_leave)
         
-        self.animate()
+        scheduler.add(self.animate)
     
     def draw_button(self):
         self.delete("all")
@@ -173,11 +167,12 @@ class AnimatedButton(tk.Canvas):
         # Border
         self.create_rectangle(2, 2, 138, 48, outline="#ffffff", width=2)
         
-        # Pulse circle when hover
-        if self.is_hover and self.pulse_size > 0:
-            self.create_oval(70-self.pulse_size, 25-self.pulse_size,
-                           70+self.pulse_size, 25+self.pulse_size,
-                           outline=self.colors[1], width=2)
+        # Pulse circle when hover, resized by animate()
+        self.pulse = None
+        if self.is_hover:
+            self.pulse = self.create_oval(70-self.pulse_size, 25-self.pulse_size,
+                                          70+self.pulse_size, 25+self.pulse_size,
+                                          outline=self.colors[1], width=2)
         
         # Text with shadow
         self.create_text(72, 27, text=self.text, fill="#333333", 
@@ -191,15 +186,15 @@ class AnimatedButton(tk.Canvas):
         c = [int(c1[i] + (c2[i] - c1[i]) * factor) for i in range(3)]
         return f'#{c[0]:02x}{c[1]:02x}{c[2]:02x}'
     
-    def animate(self):
-        if self.is_hover:
-            self.pulse_size = abs(math.sin(self.animation_frame * 0.1)) * 15
-            self.draw_button()
-            self.animation_frame += 1
-        else:
-            self.pulse_size = 0
+    def animate(self, t):
+        if not self.is_hover or self.pulse is None:
+            return
         
-        self.after(50, self.animate)
+        if self.hover_start is None:
+            self.hover_start = t
+        self.pulse_size = abs(math.sin((t - self.hover_start) * 0.1)) * 15
+        self.coords(self.pulse, 70-self.pulse_size, 25-self.pulse_size,
+                    70+self.pulse_size, 25+self.pulse_size)
     
     def on_click(self, event):
         # Click animation
@@ -209,26 +204,102 @@ class AnimatedButton(tk.Canvas):
     
     def on_enter(self, event):
         self.is_hover = True
+        self.hover_start = None
+        self.pulse_size = 0
         self.draw_button()
     
     def on_leave(self, event):
         self.is_hover = False
+        self.pulse_size = 0
         self.draw_button()
 
 
+class QuantumView(CacheView):
+    """Glowing cache slots with rainbow colors by age, moved by cache events"""
+    def __init__(self, canvas, size, colors, phase):
+        self.colors = colors
+        self.phase = phase
+        
+        width = 700
+        height = 280
+        
+        # Calculate layout
+        cols = min(size, 4)
+        rows = (size + cols - 1) // cols
+        
+        box_width = 140
+        box_height = 80
+        gap_x = 30
+        gap_y = 30
+        
+        start_x = (width - (cols * box_width + (cols - 1) * gap_x)) // 2
+        start_y = (height - (rows * box_height + (rows - 1) * gap_y)) // 2
+        
+        super().__init__(canvas, size, cols, start_x, start_y,
+                         box_width, box_height, gap_x, gap_y, max_label=10)
+    
+    def draw_empty(self):
+        # Epic "EMPTY" display
+        for i in range(5):
+            offset = math.sin(self.phase * 0.1 + i) * 3
+            self.canvas.create_text(350 + offset, 140 + offset,
+                                    text="[ EMPTY CACHE ]",
+                                    fill="#333333",
+                                    font=("Consolas", 24, "bold"), tags="empty")
+        self.canvas.create_text(350, 140, text="[ EMPTY CACHE ]",
+                                fill="#666666",
+                                font=("Consolas", 24, "bold"), tags="empty")
+    
+    def draw_slot(self, index, x, y):
+        color = self.colors[index]
+        tags = f"slot{index}"
+        
+        # Glow effect
+        for i in range(5, 0, -1):
+            self.canvas.create_rectangle(
+                x - i, y - i, x + self.box_width + i, y + self.box_height + i,
+                outline=color, width=2, tags=tags
+            )
+        
+        # Main box
+        self.canvas.create_rectangle(x, y, x + self.box_width, y + self.box_height,
+                                     fill=color, outline="#ffffff", width=3, tags=tags)
+        
+        # Labels
+        if index == 0:
+            self.canvas.create_text(x + self.box_width//2, y - 10,
+                                    text="◀ LRU", fill="#ee6055",
+                                    font=("Consolas", 10, "bold"), tags=tags)
+        else:
+            self.canvas.create_text(x + self.box_width//2, y + self.box_height + 15,
+                                    text="MRU ▶", fill="#4ecca3",
+                                    font=("Consolas", 10, "bold"), tags=f"mru{index}")
+    
+    def draw_value(self, x, y, text, tags):
+        # Value with shadow
+        self.canvas.create_text(x + 2, y + 2, text=text, fill="#000000",
+                                font=("Consolas", 20, "bold"), tags=tags)
+        self.canvas.create_text(x, y, text=text, fill="#ffffff",
+                                font=("Consolas", 20, "bold"), tags=tags)
+
+
 class CacheGUI:
-    def __init__(self, master):
+    def __init__(self, master, policy=DEFAULT_POLICY):
         self.master = master
+        self.policy = policy
         master.title("⚡ ULTRA LRU CACHE SIMULATOR ⚡")
         master.geometry("1200x800")
         master.configure(bg="#0a0e27")
         
         # Cache
         self.cache_size = 8
-        self.cache = Cache(self.cache_size)
+        self.cache = make_cache(self.policy, self.cache_size)
+        self.observed = observe(self.cache, self.on_cache_event)
+        self.view = None
         self.history = []
         
-        # Animation
+        # Animation - one scheduler for all animated canvases
+        self.scheduler = FrameScheduler(master)
         self.particles = []
         self.init_particles()
         self.animation_active = True
@@ -236,6 +307,7 @@ class CacheGUI:
         # Create animated background
         self.bg_canvas = tk.Canvas(master, bg="#0a0e27", highlightthickness=0)
         self.bg_canvas.place(x=0, y=0, relwidth=1, relheight=1)
+        self.init_background()
         
         # Main container (on top of background)
         main_container = tk.Frame(master, bg="#0a0e27")
@@ -249,7 +321,7 @@ class CacheGUI:
         self.title_canvas.pack(fill=tk.X)
         
         self.title_frame = 0
-        self.animate_title()
+        self.init_title()
         
         # Content frame
         content = tk.Frame(main_container, bg="#0a0e27")
@@ -297,17 +369,18 @@ class CacheGUI:
         
         # Mega buttons
         AnimatedButton(input_container, "READ", self.read_value, 
-                      ["#667eea", "#764ba2"]).pack(side=tk.LEFT, padx=3)
+                      ["#667eea", "#764ba2"], self.scheduler).pack(side=tk.LEFT, padx=3)
         AnimatedButton(input_container, "WRITE", self.write_value,
-                      ["#f093fb", "#f5576c"]).pack(side=tk.LEFT, padx=3)
+                      ["#f093fb", "#f5576c"], self.scheduler).pack(side=tk.LEFT, padx=3)
         AnimatedButton(input_container, "RESET", self.reset_cache,
-                      ["#fa709a", "#fee140"]).pack(side=tk.LEFT, padx=3)
+                      ["#fa709a", "#fee140"], self.scheduler).pack(side=tk.LEFT, padx=3)
         
         # Result display with hologram effect
         self.result_canvas = tk.Canvas(left_panel, bg="#0a0e27", height=80, highlightthickness=0)
         self.result_canvas.pack(fill=tk.X, pady=(0, 20))
         self.result_text = "SYSTEM READY"
         self.result_color = "#00ff41"
+        self.init_result()
         
         # Cache visualization - THE MAIN SHOW
         viz_frame = tk.Canvas(left_panel, bg="#0a0e27", highlightthickness=0)
@@ -363,10 +436,12 @@ class CacheGUI:
         scrollbar.config(command=self.history_list.yview)
         
         # Start animations
-        self.animate_background()
-        self.animate_result()
+        self.scheduler.add(self.animate_background)
+        self.scheduler.add(self.animate_title)
+        self.scheduler.add(self.animate_result)
+        self.scheduler.start()
         
-        self.update_display()
+        self.update_display(rebuild=True)
     
     def init_particles(self):
         for _ in range(50):
@@ -381,78 +456,131 @@ class CacheGUI:
             canvas.create_rectangle(x1-i, y1-i, x2+i, y2+i, 
                                    outline=color, width=i)
     
-    def animate_title(self):
-        """Animate header title"""
-        self.title_canvas.delete("all")
-        
+    def init_title(self):
+        """Create header title items once, animate_title only moves and recolors them"""
         text = "⚡ ULTRA LRU CACHE SIMULATOR ⚡"
         colors = ['#ff006e', '#fb5607', '#ffbe0b', '#8338ec', '#3a86ff']
+        self.title_items = []
+        self.title_step = 0
         
         x = 600
         for i, char in enumerate(text):
-            offset = math.sin((self.title_frame + i) * 0.2) * 5
-            color = colors[(self.title_frame // 10 + i) % len(colors)]
-            
             # Shadow
-            self.title_canvas.create_text(x + i * 20 + 2, 52 + offset, 
-                                         text=char, fill="#000000",
-                                         font=("Consolas", 24, "bold"))
+            shadow = self.title_canvas.create_text(x + i * 20 + 2, 52,
+                                                   text=char, fill="#000000",
+                                                   font=("Consolas", 24, "bold"))
             # Main text
-            self.title_canvas.create_text(x + i * 20, 50 + offset,
-                                         text=char, fill=color,
-                                         font=("Consolas", 24, "bold"))
-        
-        self.title_frame += 1
-        self.master.after(50, self.animate_title)
+            main = self.title_canvas.create_text(x + i * 20, 50, text=char,
+                                                 fill=colors[i % len(colors)],
+                                                 font=("Consolas", 24, "bold"))
+            self.title_items.append((shadow, main))
+        
+        # Frame rate counter
+        self.stats_text = ""
+        self.stats_item = self.title_canvas.create_text(10, 8, anchor=tk.NW, text="",
+                                                        fill="#555577", font=("Consolas", 9))
     
-    def animate_background(self):
-        """Animate particle background"""
-        self.bg_canvas.delete("all")
+    def animate_title(self, t):
+        """Animate header title"""
+        self.title_frame = int(t)
         
-        width = self.bg_canvas.winfo_width() or 1200
-        height = self.bg_canvas.winfo_height() or 800
+        colors = ['#ff006e', '#fb5607', '#ffbe0b', '#8338ec', '#3a86ff']
+        step = self.title_frame // 10
+        recolor = step != self.title_step
+        self.title_step = step
         
-        # Update and draw particles
+        x = 600
+        for i, (shadow, main) in enumerate(self.title_items):
+            offset = math.sin((t + i) * 0.2) * 5
+            self.title_canvas.coords(shadow, x + i * 20 + 2, 52 + offset)
+            self.title_canvas.coords(main, x + i * 20, 50 + offset)
+            if recolor:
+                self.title_canvas.itemconfig(main, fill=colors[(step + i) % len(colors)])
+        
+        stats = f"{self.scheduler.fps:.0f} fps  {self.scheduler.cpu_per_frame:.1f} ms CPU/frame"
+        if stats != self.stats_text:
+            self.stats_text = stats
+            self.title_canvas.itemconfig(self.stats_item, text=stats)
+    
+    def init_background(self):
+        """Create particle and connection items once, animate_background only moves them"""
+        self.particle_items = []
         for particle in self.particles:
-            particle.update(width, height)
-            self.bg_canvas.create_oval(
+            self.particle_items.append(self.bg_canvas.create_oval(
                 particle.x - particle.size, particle.y - particle.size,
                 particle.x + particle.size, particle.y + particle.size,
                 fill=particle.color, outline=""
-            )
+            ))
         
-        # Draw connections
+        # Connections between neighbours, shown while they are close
+        self.links = []
         for i, p1 in enumerate(self.particles[:20]):
             for p2 in self.particles[i+1:i+4]:
-                dist = math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
-                if dist < 100:
-                    alpha = int((1 - dist/100) * 50)
-                    self.bg_canvas.create_line(p1.x, p1.y, p2.x, p2.y,
-                                              fill=p1.color, width=1)
+                line = self.bg_canvas.create_line(p1.x, p1.y, p2.x, p2.y,
+                                                  fill=p1.color, width=1, state=tk.HIDDEN)
+                self.links.append([p1, p2, line, False])
         
-        if self.animation_active:
-            self.master.after(50, self.animate_background)
+        self.background_time = None
     
-    def animate_result(self):
-        """Animate result display"""
-        self.result_canvas.delete("all")
+    def animate_background(self, t):
+        """Animate particle background"""
+        if not self.animation_active:
+            return
+        
+        step = t - self.background_time if self.background_time is not None else 1
+        self.background_time = t
+        
+        width = self.bg_canvas.winfo_width() or 1200
+        height = self.bg_canvas.winfo_height() or 800
         
+        # Update and move particles
+        for particle, item in zip(self.particles, self.particle_items):
+            particle.update(width, height, step)
+            self.bg_canvas.coords(item,
+                particle.x - particle.size, particle.y - particle.size,
+                particle.x + particle.size, particle.y + particle.size
+            )
+        
+        # Update connections
+        for link in self.links:
+            p1, p2, line, shown = link
+            dist = math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
+            if dist < 100:
+                self.bg_canvas.coords(line, p1.x, p1.y, p2.x, p2.y)
+            if (dist < 100) != shown:
+                link[3] = dist < 100
+                self.bg_canvas.itemconfig(line, state=tk.NORMAL if link[3] else tk.HIDDEN)
+    
+    def init_result(self):
+        """Create result display items once, animate_result only moves and recolors them"""
         # Glowing background
+        self.result_glow = []
         for i in range(5, 0, -1):
-            self.result_canvas.create_rectangle(10-i, 10-i, 740+i, 70+i,
-                                               outline=self.result_color, width=2)
+            self.result_glow.append(self.result_canvas.create_rectangle(
+                10-i, 10-i, 740+i, 70+i, outline=self.result_color, width=2))
         
         self.result_canvas.create_rectangle(10, 10, 740, 70, 
                                            fill="#0f1419", outline="")
         
-        # Animated text
-        glow = abs(math.sin(self.title_frame * 0.1)) * 3
-        self.result_canvas.create_text(375+glow, 40+glow, text=self.result_text,
-                                      fill="#333333", font=("Consolas", 20, "bold"))
-        self.result_canvas.create_text(375, 40, text=self.result_text,
-                                      fill=self.result_color, font=("Consolas", 20, "bold"))
+        self.result_shadow = self.result_canvas.create_text(375, 40, text=self.result_text,
+                                                            fill="#333333", font=("Consolas", 20, "bold"))
+        self.result_main = self.result_canvas.create_text(375, 40, text=self.result_text,
+                                                          fill=self.result_color, font=("Consolas", 20, "bold"))
+        self.result_shown = (self.result_text, self.result_color)
+    
+    def animate_result(self, t):
+        """Animate result display"""
+        if self.result_shown != (self.result_text, self.result_color):
+            self.result_shown = (self.result_text, self.result_color)
+            for item in self.result_glow:
+                self.result_canvas.itemconfig(item, outline=self.result_color)
+            self.result_canvas.itemconfig(self.result_shadow, text=self.result_text)
+            self.result_canvas.itemconfig(self.result_main, text=self.result_text,
+                                          fill=self.result_color)
         
-        self.master.after(50, self.animate_result)
+        # Animated text
+        glow = abs(math.sin(t * 0.1)) * 3
+        self.result_canvas.coords(self.result_shadow, 375+glow, 40+glow)
     
     def create_stat_card(self, parent, title, color, var_name):
         """Create animated stat card"""
@@ -478,12 +606,14 @@ class CacheGUI:
         new_size = int(value)
         if new_size != self.cache_size:
             self.cache_size = new_size
-            self.cache = Cache(self.cache_size)
-            self.history.clear()
-            self.history_list.delete(0, tk.END)
+            cache = resize_cache(self.cache, self.policy, self.cache_size)
+            if cache is not self.cache:
+                self.cache = cache
+                self.observed = observe(self.cache, self.on_cache_event)
             self.result_text = f"CACHE RESIZED TO {new_size}"
             self.result_color = "#00ff41"
-            self.update_display()
+            # Slot layout follows the size
+            self.update_display(rebuild=True)
     
     def read_value(self):
         value = self.entry.get().strip()
@@ -510,12 +640,13 @@ class CacheGUI:
         self.update_display()
     
     def reset_cache(self):
-        self.cache.reset()
+        self.cache = make_cache(self.policy, self.cache_size)
+        self.observed = observe(self.cache, self.on_cache_event)
         self.history.clear()
         self.history_list.delete(0, tk.END)
         self.result_text = "⚡ CACHE PURGED ⚡"
         self.result_color = "#ffd97d"
-        self.update_display()
+        self.update_display(rebuild=True)
     
     def add_history(self, operation, value, result):
         time = datetime.now().strftime("%H:%M:%S.%f")[:-3]
@@ -529,78 +660,26 @@ class CacheGUI:
         else:
             self.history_list.itemconfig(0, fg="#ee6055")
     
-    def update_display(self):
-        """Update all displays with EPIC visuals"""
-        elements = self.cache.get_elements()
-        self.cache_canvas.delete("all")
+    def on_cache_event(self, event, value):
+        """Move only the boxes touched by a cache operation"""
+        self.view.on_event(event, value)
+    
+    def draw_cache(self):
+        """Rebuild the whole cache visualization"""
+        n = self.cache_size
         
-        width = 700
-        height = 280
+        # Age-based color (rainbow gradient)
+        colors = [self.hsv_to_rgb((i / max(n - 1, 1)) * 300, 0.8, 0.9)  # 0 to 300 degrees
+                  for i in range(n)]
         
-        if not elements:
-            # Epic "EMPTY" display
-            for i in range(5):
-                offset = math.sin(self.title_frame * 0.1 + i) * 3
-                self.cache_canvas.create_text(350 + offset, 140 + offset,
-                                             text="[ EMPTY CACHE ]",
-                                             fill="#333333",
-                                             font=("Consolas", 24, "bold"))
-            self.cache_canvas.create_text(350, 140, text="[ EMPTY CACHE ]",
-                                         fill="#666666",
-                                         font=("Consolas", 24, "bold"))
-        else:
-            # Calculate layout
-            n = len(elements)
-            cols = min(n, 4)
-            rows = (n + cols - 1) // cols
-            
-            box_width = 140
-            box_height = 80
-            gap_x = 30
-            gap_y = 30
-            
-            start_x = (width - (cols * box_width + (cols - 1) * gap_x)) // 2
-            start_y = (height - (rows * box_height + (rows - 1) * gap_y)) // 2
-            
-            for idx, elem in enumerate(elements):
-                row = idx // cols
-                col = idx % cols
-                
-                x = start_x + col * (box_width + gap_x)
-                y = start_y + row * (box_height + gap_y)
-                
-                # Age-based color (rainbow gradient)
-                hue = (idx / max(n - 1, 1)) * 300  # 0 to 300 degrees
-                color = self.hsv_to_rgb(hue, 0.8, 0.9)
-                
-                # Glow effect
-                for i in range(5, 0, -1):
-                    self.cache_canvas.create_rectangle(
-                        x - i, y - i, x + box_width + i, y + box_height + i,
-                        outline=color, width=2
-                    )
-                
-                # Main box
-                self.cache_canvas.create_rectangle(x, y, x + box_width, y + box_height,
-                                                  fill=color, outline="#ffffff", width=3)
-                
-                # Value with shadow
-                self.cache_canvas.create_text(x + box_width//2 + 2, y + box_height//2 + 2,
-                                             text=str(elem), fill="#000000",
-                                             font=("Consolas", 20, "bold"))
-                self.cache_canvas.create_text(x + box_width//2, y + box_height//2,
-                                             text=str(elem), fill="#ffffff",
-                                             font=("Consolas", 20, "bold"))
-                
-                # Labels
-                if idx == 0:
-                    self.cache_canvas.create_text(x + box_width//2, y - 10,
-                                                 text="◀ LRU", fill="#ee6055",
-                                                 font=("Consolas", 10, "bold"))
-                elif idx == n - 1:
-                    self.cache_canvas.create_text(x + box_width//2, y + box_height + 15,
-                                                 text="MRU ▶", fill="#4ecca3",
-                                                 font=("Consolas", 10, "bold"))
+        self.view = QuantumView(self.cache_canvas, n, colors, self.title_frame)
+        self.view.fill(self.cache.get_elements())
+    
+    def update_display(self, rebuild=False):
+        """Update all displays with EPIC visuals"""
+        # Engines with cache events keep the canvas up to date by themselves
+        if rebuild or not self.observed:
+            self.draw_cache()
         
         # Update stats
         self.hits_label.config(text=str(self.cache.hits))
@@ -639,5 +718,5 @@ class CacheGUI:
 
 if __name__ == "__main__":
     root = tk.Tk()
-    gui = CacheGUI(root)
+    gui = CacheGUI(root, sys.argv[1] if len(sys.argv) > 1 else DEFAULT_POLICY)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,181 @@
+'''@package docstring
+ARC (Adaptive Replacement Cache) engine with the Cache interface
+'''
+
+'''
+ARC (Megiddo, Modha 2003) keeps four LRU lists:
+- T1 - values seen once recently,   B1 - ghosts (keys only) evicted from T1
+- T2 - values seen at least twice,  B2 - ghosts evicted from T2
+|T1| + |T2| <= size and |T1| + |T2| + |B1| + |B2| <= 2 * size.
+The target size p of T1 grows on a hit in B1 (recency is paying off) and
+shrinks on a hit in B2 (frequency is paying off), so a one-time scan only
+flows through T1 and does not wipe out the frequently used values in T2.
+
+As in Cache, READ does not insert on a MISS - it does not change any list,
+ghost hits included. WRITE is a full ARC reference.
+'''
+
+from proj import Cache
+
+T1, T2, B1, B2 = range(4)
+
+
+class ARCCache:
+    """ Adaptive Replacement Cache with the same read/write/hits/misses interface as Cache """
+
+    def __init__(self, size):
+        """
+        Initialize cache with given size; all four lists are Cache.Queue doubly linked lists.
+        :param size: maximum number of values in the cache (ghosts are not counted)
+        """
+        self.size = size
+        self.p = 0
+        self.lists = [Cache.Queue() for _ in range(4)]
+        self.lengths = [0, 0, 0, 0]
+        self.where = dict()         # key -> (list, node)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0          # values that left T1 or T2
+
+    def _push(self, which, value):
+        """
+        Put value at the MRU end of a list
+        :param which: T1, T2, B1 or B2
+        :param value: value to append
+        """
+        self.where[value] = (which, self.lists[which].append(value))
+        self.lengths[which] += 1
+
+    def _remove(self, value):
+        """
+        Remove value from the list holding it
+        :param value: value to remove
+        """
+        which, node = self.where.pop(value)
+        self.lists[which].pop(node)
+        self.lengths[which] -= 1
+
+    def _pop_lru(self, which):
+        """
+        Remove the LRU value of a list
+        :param which: T1, T2, B1 or B2
+        :return: removed value
+        """
+        value = self.lists[which].pop_head()
+        del self.where[value]
+        self.lengths[which] -= 1
+        return value
+
+    def _replace(self, in_b2):
+        """
+        Move the LRU value of T1 or T2 to its ghost list, choosing by the target size p
+        :param in_b2: True if the referenced value is a ghost in B2
+        """
+        self.evictions += 1
+        t1 = self.lengths[T1]
+        if t1 and (t1 > self.p or (in_b2 and t1 == self.p)):
+            self._push(B1, self._pop_lru(T1))
+        else:
+            self._push(B2, self._pop_lru(T2))
+
+    def _hit(self, value):
+        """
+        Check for a HIT and move the value to the MRU end of T2
+        :param value: referenced value
+        :return: True if HIT, False if MISS
+        """
+        entry = self.where.get(value)
+
+        if entry is not None and entry[0] <= T2:
+            self.hits += 1
+            self._remove(value)
+            self._push(T2, value)
+            return True
+
+        self.misses += 1
+        return False
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+        if self._hit(value):
+            return True
+
+        lengths = self.lengths
+        size = self.size
+        entry = self.where.get(value)
+
+        if entry is not None and entry[0] == B1:
+            # ghost hit in B1, favour recency
+            self.p = min(size, self.p + max(lengths[B2] // lengths[B1], 1))
+            self._replace(False)
+            self._remove(value)
+            self._push(T2, value)
+            return False
+
+        if entry is not None and entry[0] == B2:
+            # ghost hit in B2, favour frequency
+            self.p = max(0, self.p - max(lengths[B1] // lengths[B2], 1))
+            self._replace(True)
+            self._remove(value)
+            self._push(T2, value)
+            return False
+
+        # completely new value
+        if lengths[T1] + lengths[B1] == size:
+            if lengths[T1] < size:
+                self._pop_lru(B1)
+                self._replace(False)
+            else:
+                self._pop_lru(T1)
+                self.evictions += 1
+        else:
+            total = lengths[T1] + lengths[T2] + lengths[B1] + lengths[B2]
+            if total >= size:
+                if total == 2 * size:
+                    self._pop_lru(B2)
+                self._replace(False)
+
+        self._push(T1, value)
+        return False
+
+    def read(self, value):
+        """
+        Read value from the cache; a MISS (ghost hit included) does not change anything
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+        return self._hit(value)
+
+    def get_elements(self):
+        """
+        Return cached values: T1 from LRU to MRU followed by T2 from LRU to MRU
+        :return: list of values
+        """
+        return self.lists[T1].to_list() + self.lists[T2].to_list()
+
+
+if __name__ == "__main__":
+    from traces import scan_keys, zipf_keys
+
+    workloads = (
+        ("Zipf 0.8", zipf_keys(500_000, 50_000, alpha=0.8)),
+        ("Zipf 1.0", zipf_keys(500_000, 50_000, alpha=1.0)),
+        ("Zipf 0.8 + scans", scan_keys(500_000, 50_000, alpha=0.8)),
+    )
+
+    print("Hit ratio (every access is a WRITE):")
+    for name, keys in workloads:
+        for size in (500, 5_000):
+            ratios = []
+            for cache_class in (Cache, ARCCache):
+                cache = cache_class(size)
+                write = cache.write
+                for key in keys:
+                    write(key)
+                ratios.append(cache.hits / len(keys))
+            print(f"    {name:<18} size {size:<6} LRU {ratios[0]:.4f}  ARC {ratios[1]:.4f}  "
+                  f"gain {100 * (ratios[1] - ratios[0]):+.2f} pp")
@@ -0,0 +1,221 @@
+'''@package docstring
+LRU cache keeping its recency list in preallocated integer arrays
+'''
+
+from array import array
+
+'''
+Every entry lives in a slot (0 .. size-1). For a slot we keep:
+- keys[slot]  - key stored in the slot
+- prev[slot]  - slot of the older neighbour in the LRU list
+- next[slot]  - slot of the newer neighbour in the LRU list
+
+Slot number `size` is a sentinel closing the list into a ring, so
+next[sentinel] is the LRU (head) and prev[sentinel] is the MRU (tail).
+On a hit the slot is relinked in place, on eviction the head slot is reused
+for the new key, so after warm-up no objects are allocated at all.
+'''
+
+class ArrayCache:
+    """ LRU cache with the same interface as Cache, backed by flat arrays instead of Node objects """
+
+    def __init__(self, size):
+        """
+        Initialize cache with given size; preallocates the link arrays for all slots.
+        :param size: maximum size of the cache
+        """
+        self.size = size
+        self.cache = dict()
+        self.keys = [None] * size
+        self.prev = array('l', [size]) * (size + 1)
+        self.next = array('l', [size]) * (size + 1)
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _unlink(self, slot):
+        """
+        Remove slot from the LRU list
+        :param slot: slot to remove
+        """
+        prev = self.prev
+        next = self.next
+
+        before = prev[slot]
+        after = next[slot]
+        next[before] = after
+        prev[after] = before
+
+    def _link_tail(self, slot):
+        """
+        Put slot at the MRU end of the LRU list
+        :param slot: slot to append
+        """
+        prev = self.prev
+        next = self.next
+        sentinel = self.size
+
+        tail = prev[sentinel]
+        prev[slot] = tail
+        next[slot] = sentinel
+        next[tail] = slot
+        prev[sentinel] = slot
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+
+        slot = self.cache.get(value)
+
+        if slot is not None:
+            # HIT case - relink the slot at the newest position (_unlink and _link_tail inlined)
+            self.hits += 1
+            prev = self.prev
+            sentinel = self.size
+            tail = prev[sentinel]
+            if tail != slot:
+                next = self.next
+                before = prev[slot]
+                after = next[slot]
+                next[before] = after
+                prev[after] = before
+                prev[slot] = tail
+                next[slot] = sentinel
+                next[tail] = slot
+                prev[sentinel] = slot
+            return True
+
+        # MISS case
+
+        self.misses += 1
+
+        if self.used < self.size:
+            # there is still a never used slot
+            slot = self.used
+            self.used += 1
+        else:
+            # cache is full, reuse the slot of the oldest value
+            slot = self.next[self.size]
+            self._unlink(slot)
+            del self.cache[self.keys[slot]]
+            self.evictions += 1
+
+        self.keys[slot] = value
+        self.cache[value] = slot
+        self._link_tail(slot)
+
+        return False
+
+    def read(self, value):
+        """
+        Read value from the cache
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+
+        slot = self.cache.get(value)
+
+        if slot is not None:
+            # HIT case - relink the slot at the newest position (_unlink and _link_tail inlined)
+            self.hits += 1
+            prev = self.prev
+            sentinel = self.size
+            tail = prev[sentinel]
+            if tail != slot:
+                next = self.next
+                before = prev[slot]
+                after = next[slot]
+                next[before] = after
+                prev[after] = before
+                prev[slot] = tail
+                next[slot] = sentinel
+                next[tail] = slot
+                prev[sentinel] = slot
+            return True
+
+        # MISS case - do nothing
+        self.misses += 1
+        return False
+
+    def get_elements(self):
+        """
+        Return cached values ordered from LRU to MRU
+        :return: list of values
+        """
+        elements = []
+        sentinel = self.size
+        slot = self.next[sentinel]
+
+        while slot != sentinel:
+            elements.append(self.keys[slot])
+            slot = self.next[slot]
+
+        return elements
+
+    def display(self):
+        """
+        Display the cache
+        """
+        elements = [str(value) for value in self.get_elements()]
+        print("Cache [LRU -> MRU]:", " -> ".join(elements) if elements else "EMPTY")
+        print(f"HITS: {self.hits}, MISSES: {self.misses}")
+
+
+def _memory_per_entry(cache_class, n):
+    """
+    Measure memory allocated by a cache filled with n distinct keys
+    :param cache_class: class of the cache to measure
+    :param n: number of entries
+    :return: bytes per entry (keys themselves are allocated before measuring)
+    """
+    import tracemalloc
+
+    keys = list(range(n))
+    tracemalloc.start()
+    cache = cache_class(n)
+    for key in keys:
+        cache.write(key)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return used / n
+
+
+def _ops_per_second(cache_class, size, keys):
+    """
+    Measure throughput of a cache on a sequence of writes
+    :param cache_class: class of the cache to measure
+    :param size: size of the cache
+    :param keys: keys to write
+    :return: (operations per second, hits)
+    """
+    import time
+
+    cache = cache_class(size)
+    write = cache.write
+    start = time.perf_counter()
+    for key in keys:
+        write(key)
+    elapsed = time.perf_counter() - start
+
+    return len(keys) / elapsed, cache.hits
+
+
+if __name__ == "__main__":
+    from proj import Cache
+    from traces import zipf_keys
+
+    n = 200_000
+    print(f"Memory per entry ({n} entries):")
+    for cache_class in (Cache, ArrayCache):
+        print(f"    {cache_class.__name__:<12} {_memory_per_entry(cache_class, n):8.1f} B")
+
+    keys = zipf_keys(1_000_000, 100_000, alpha=0.9)
+    print(f"Throughput (Zipf 0.9, {len(keys)} writes, cache size 10000):")
+    for cache_class in (Cache, ArrayCache):
+        ops, hits = _ops_per_second(cache_class, 10_000, keys)
+        print(f"    {cache_class.__name__:<12} {ops:12,.0f} ops/s  hits={hits}")
@@ -0,0 +1,188 @@
+'''@package docstring
+Asyncio read-through cache with single-flight loading of missing keys
+'''
+
+'''
+await cache.get(key, loader) returns the cached payload on a HIT. On a MISS the
+first caller starts loader(key) as a task and registers it as in flight; every
+other caller missing the same key meanwhile awaits that task instead of calling
+the backend again (single flight). The loaded payload enters the cache through
+the normal LRU write path as a clean entry (so hits/misses count it as a WRITE;
+gets and get_misses count the get calls alone). If a client writes the key while
+it is loading, the loaded payload is stale: it is dropped and the waiters get
+the client's payload.
+
+A dirty entry evicted to the sink is newer than the backend until the sink
+flushes it, so a MISS looks into the sink first and re-caches a queued payload
+(clean, it is already on its way to the backend) without calling the loader.
+
+Waiters await the task through asyncio.shield, so a cancelled caller does not
+cancel the load for the others. A loader that times out or fails raises in all
+callers waiting for it and nothing is cached.
+'''
+
+import asyncio
+
+from kv_cache import KVCache
+
+
+class AsyncCache(KVCache):
+    """ KVCache with an asyncio read-through front end coalescing concurrent loads of a key """
+
+    def __init__(self, size, sink=None, timeout=None):
+        """
+        Initialize cache
+        :param size: maximum size of the cache
+        :param sink: WriteBackSink receiving dirty entries (None to drop them)
+        :param timeout: default loader timeout in seconds (None for no timeout)
+        """
+        super().__init__(size, sink)
+        self.timeout = timeout
+        self.inflight = dict()      # key -> task loading the key
+        self.gets = 0
+        self.get_misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    async def get(self, key, loader, timeout=None):
+        """
+        Return payload of the key, loading it on a MISS
+        :param key: key to read
+        :param loader: coroutine function called as loader(key) to fetch the payload from the backend
+        :param timeout: loader timeout in seconds for this call (cache default if None)
+        :return: payload of the key
+        """
+        self.gets += 1
+        if self.read(key):
+            return self.data[key]
+
+        self.get_misses += 1
+        queued, payload = self._queued(key)
+        if queued:
+            return payload
+
+        task = self.inflight.get(key)
+
+        if task is None:
+            timeout = self.timeout if timeout is None else timeout
+            task = asyncio.get_running_loop().create_task(self._load(key, loader, timeout))
+            self.inflight[key] = task
+        else:
+            # somebody is already loading the key, wait for the same result
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader, timeout):
+        """
+        Call the loader once and put the result into the cache
+        :param key: key to load
+        :param loader: coroutine function fetching the payload
+        :param timeout: timeout in seconds (None for no timeout)
+        :return: loaded payload
+        """
+        self.loads += 1
+
+        try:
+            payload = await asyncio.wait_for(loader(key), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            del self.inflight[key]
+
+        if key in self.cache:
+            # a client wrote the key while it was loading, its payload is newer than the backend's
+            return self.data[key]
+
+        # a client wrote the key and it was evicted while loading, the backend's payload is stale too
+        queued, newer = self._queued(key)
+        if queued:
+            return newer
+
+        self.write(key, payload, dirty=False)
+
+        return payload
+
+    def _queued(self, key):
+        """
+        Serve a MISS from the write-back sink: a payload queued there is newer than the backend's
+        :param key: missing key
+        :return: (True, payload) if the sink had the key, which is cached again, (False, None) otherwise
+        """
+        if self.sink is None:
+            return False, None
+
+        queued, payload = self.sink.find(key)
+        if queued:
+            self.write(key, payload, dirty=False)
+        return queued, payload
+
+    def load_savings(self):
+        """
+        Compare backend calls with a cache that loads on every MISS
+        :return: dict with gets, misses, loads, saved, coalesced, timeouts and failures
+        """
+        return {
+            "gets": self.gets,
+            "misses": self.get_misses,
+            "loads": self.loads,
+            "saved": self.get_misses - self.loads,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+if __name__ == "__main__":
+    import time
+    from kv_cache import WriteBackSink
+    from traces import zipf_keys
+
+    async def main(n_requests=20_000, concurrency=200, size=1_000, latency=0.005):
+        cache = AsyncCache(size, timeout=1.0)
+        backend_calls = 0
+
+        async def loader(key):
+            nonlocal backend_calls
+            backend_calls += 1
+            await asyncio.sleep(latency)
+            return f"payload {key}"
+
+        keys = zipf_keys(n_requests, 20_000, alpha=1.0)
+
+        async def client(offset):
+            for i in range(offset, n_requests, concurrency):
+                await cache.get(keys[i], loader)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        stats = cache.load_savings()
+        print(f"{n_requests} gets from {concurrency} clients, cache size {size}, backend latency {latency * 1000:.0f} ms:")
+        print(f"    HITS: {stats['gets'] - stats['misses']}, MISSES: {stats['misses']}, {n_requests / elapsed:,.0f} gets/s")
+        print(f"    backend calls {backend_calls} (one per MISS would be {stats['misses']}), "
+              f"saved {stats['saved']}, coalesced {stats['coalesced']}, timeouts {stats['timeouts']}")
+
+    async def check_write_back():
+        # a dirty entry evicted to the sink must not be shadowed by the older backend payload
+        store = {"a": "old"}
+
+        async def loader(key):
+            return store[key]
+
+        cache = AsyncCache(1, WriteBackSink(store.update))
+        cache.write("a", "new")
+        cache.write("b", "x")
+        assert await cache.get("a", loader) == "new"
+        cache.flush()
+        assert store["a"] == "new"
+
+    asyncio.run(check_write_back())
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+'''@package docstring
+Benchmarks of the ways to drive the cache
+'''
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from proj import Cache
+from policy import POLICIES, make_cache
+from traces import READ, WRITE, read_commands, scan_keys, zipf_ops
+
+
+def write_text_trace(path, ops):
+    """
+    Save operations as text commands accepted by the CLI
+    :param path: path of the trace file
+    :param ops: iterable of (op, value) tuples
+    """
+    with open(path, "w") as trace:
+        for op, value in ops:
+            trace.write(f"{'READ' if op == READ else 'WRITE'} {value}\n")
+
+
+def per_op_loop(cache, path):
+    """
+    Drive the cache the way the interactive CLI does: one print and one display() per command
+    :param cache: cache to drive
+    :param path: path of the text trace
+    """
+    with open(path) as trace, contextlib.redirect_stdout(io.StringIO()) as out:
+        for op, value in read_commands(trace):
+            hit = cache.read(value) if op == READ else cache.write(value)
+            print("HIT" if hit else "MISS")
+            cache.display()
+            # drop the output so memory does not grow with the trace
+            out.seek(0)
+            out.truncate()
+
+
+def replay_loop(cache, path):
+    """
+    Drive the cache with Cache.replay over a generator reading the file
+    :param cache: cache to drive
+    :param path: path of the text trace
+    """
+    with open(path) as trace:
+        cache.replay(read_commands(trace))
+
+
+def bench_replay(n_ops=200_000, size=100):
+    """
+    Compare the per-op CLI loop with Cache.replay on the same text trace
+    :param n_ops: number of operations in the trace
+    :param size: size of the cache
+    """
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+
+    try:
+        write_text_trace(path, zipf_ops(n_ops, 10 * size, alpha=0.9))
+
+        print(f"Text trace of {n_ops} ops, cache size {size}:")
+        for name, loop in (("per-op loop", per_op_loop), ("replay", replay_loop)):
+            cache = Cache(size)
+            start = time.perf_counter()
+            loop(cache, path)
+            elapsed = time.perf_counter() - start
+            print(f"    {name:<12} {n_ops / elapsed:12,.0f} ops/s  hits={cache.hits} misses={cache.misses}")
+    finally:
+        os.remove(path)
+
+
+def _run(cache, ops):
+    """
+    Apply operations to a cache
+    :param cache: cache to drive
+    :param ops: list of (op, value) tuples
+    """
+    read = cache.read
+    write = cache.write
+    for op, value in ops:
+        if op == READ:
+            read(value)
+        else:
+            write(value)
+
+
+def compare_policies(names, ops, size):
+    """
+    Run registered policies over the same trace
+    :param names: registered policy names
+    :param ops: list of (op, value) tuples
+    :param size: size of every cache
+    :return: list of (name, hit ratio, ops/s, peak memory in bytes)
+    """
+    results = []
+
+    for name in names:
+        # timed run without tracing, tracemalloc slows allocations down a lot
+        cache = make_cache(name, size)
+        start = time.perf_counter()
+        _run(cache, ops)
+        elapsed = time.perf_counter() - start
+        hit_ratio = cache.hits / len(ops) if ops else 0.0
+
+        tracemalloc.start()
+        _run(make_cache(name, size), ops)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append((name, hit_ratio, len(ops) / elapsed, peak))
+
+    return results
+
+
+def bench_policies(names=None, size=1_000, n_ops=300_000):
+    """
+    Print comparison of policies on the bundled synthetic traces
+    :param names: registered policy names (all if None)
+    :param size: size of every cache
+    :param n_ops: number of operations of every trace
+    """
+    names = names or sorted(POLICIES)
+    workloads = (
+        ("Zipf 0.9, 30% WRITE", zipf_ops(n_ops, 50 * size, alpha=0.9)),
+        ("Zipf 0.8 + scans, WRITE only", [(WRITE, key) for key in scan_keys(n_ops, 50 * size, alpha=0.8)]),
+    )
+
+    for workload, ops in workloads:
+        print(f"{workload}, {n_ops} ops, cache size {size}:")
+        print(f"    {'POLICY':<10} {'HIT RATIO':>9} {'OPS/S':>12} {'PEAK MEMORY':>12}")
+        for name, hit_ratio, ops_per_second, peak in compare_policies(names, ops, size):
+            print(f"    {name:<10} {hit_ratio:9.4f} {ops_per_second:12,.0f} {peak / 1024:9,.0f} KiB")
+
+
+def bench_snapshot(size=1_000_000):
+    """
+    Time Cache.snapshot and Cache.load of a full cache, and the cold misses the snapshot saves
+    :param size: number of entries
+    """
+    fd, path = tempfile.mkstemp(suffix=".lrus")
+    os.close(fd)
+
+    try:
+        cache = Cache(size)
+        cache.replay((WRITE, f"key {i}") for i in range(size))
+
+        start = time.perf_counter()
+        cache.snapshot(path)
+        saved = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = Cache.load(path)
+        loaded = time.perf_counter() - start
+
+        ops = zipf_ops(200_000, 2 * size, alpha=0.9)
+        ops = [(op, f"key {key}") for op, key in ops]
+        cold_hits, _ = Cache(size).replay(ops)
+        warm_hits, _ = warm.replay(ops)
+
+        print(f"Snapshot of {size} entries, {os.path.getsize(path) / 2 ** 20:.1f} MiB:")
+        print(f"    snapshot {saved:.3f} s, load {loaded:.3f} s")
+        print(f"    next {len(ops)} ops: cold start {cold_hits} HITS, warm start {warm_hits} HITS")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cache benchmarks.")
+    parser.add_argument("benchmark", choices=("policies", "replay", "snapshot"), nargs="?", default="policies",
+                        help="policies: compare registered policies, replay: Cache.replay vs CLI loop, "
+                             "snapshot: save and warm restart of a full cache")
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES), help="policy to compare (repeatable)")
+    parser.add_argument("--size", type=int, default=1_000, help="cache size")
+    args = parser.parse_args()
+
+    if args.benchmark == "replay":
+        bench_replay(size=args.size)
+    elif args.benchmark == "snapshot":
+        bench_snapshot(args.size)
+    else:
+        bench_policies(args.policy, args.size)
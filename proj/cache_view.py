@@ -0,0 +1,240 @@
+'''@package docstring
+Canvas view of a cache from LRU to MRU that is updated by cache events (see events.py) instead of being redrawn
+'''
+
+'''
+The canvas has one slot per entry of the cache, in rows of cols slots; slot i
+shows the i-th value from the LRU end. Slot decorations are drawn once per
+size by draw_slot: items tagged "slot<i>" are shown while the slot is used and
+items tagged "mru<i>" only on the last used slot. Every value has items of its
+own (tagged "value" and with a tag of its own) that are moved, never redrawn;
+the items of an evicted value are recycled by the next insert.
+
+When a value leaves slot i, the values behind it move back by one slot. A row
+of them is found with addtag_overlapping on the line through the slot centers
+and moved with one canvas.move, so an event takes a few canvas calls per row
+of slots, whatever the number of values.
+'''
+
+from events import INSERT, PROMOTE
+
+HIDDEN = "hidden"
+NORMAL = "normal"
+
+
+class CacheView:
+    """ Slots on a tkinter Canvas showing cache values from LRU to MRU """
+
+    def __init__(self, canvas, size, cols, x, y, box_width, box_height, gap_x, gap_y, max_label=8):
+        """
+        Clear the canvas and draw empty slots
+        :param canvas: tkinter Canvas
+        :param size: number of slots (size of the cache)
+        :param cols: slots per row
+        :param x, y: top left corner of slot 0
+        :param box_width, box_height: size of a slot
+        :param gap_x, gap_y: space between slots
+        :param max_label: longer values are shortened, so that labels never reach the next slot
+        """
+        self.canvas = canvas
+        self.size = size
+        self.cols = cols
+        self.x = x
+        self.y = y
+        self.box_width = box_width
+        self.box_height = box_height
+        self.step_x = box_width + gap_x
+        self.step_y = box_height + gap_y
+        self.max_label = max_label
+        self.values = dict()    # value -> tag of its items
+        self.spare = []         # tags of hidden items left by removed values
+        self.count = 0
+        self.serial = 0
+
+        canvas.delete("all")
+        self.draw_empty()
+        for i in range(size):
+            x, y = self.slot_xy(i)
+            self.draw_slot(i, x, y)
+            canvas.itemconfig(f"slot{i}", state=HIDDEN)
+            canvas.itemconfig(f"mru{i}", state=HIDDEN)
+
+    def draw_empty(self):
+        """
+        Draw the items shown while the cache is empty, tagged "empty"
+        """
+        raise NotImplementedError
+
+    def draw_slot(self, index, x, y):
+        """
+        Draw decorations of one slot, tagged "slot<index>" (and "mru<index>" for the MRU marker)
+        :param index: slot number, 0 is the LRU end
+        :param x, y: top left corner of the slot
+        """
+        raise NotImplementedError
+
+    def draw_value(self, x, y, text, tags):
+        """
+        Draw items of one value, text items only (a recycled value gets a new text)
+        :param x, y: center of the slot
+        :param text: label of the value
+        :param tags: tags every item must get
+        """
+        raise NotImplementedError
+
+    def slot_xy(self, index):
+        """
+        :param index: slot number
+        :return: top left corner of the slot
+        """
+        row, col = divmod(index, self.cols)
+        return self.x + col * self.step_x, self.y + row * self.step_y
+
+    def center(self, index):
+        """
+        :param index: slot number
+        :return: center of the slot
+        """
+        x, y = self.slot_xy(index)
+        return x + self.box_width / 2, y + self.box_height / 2
+
+    def slot_of(self, tag):
+        """
+        :param tag: tag of the items of a value
+        :return: slot the items are in
+        """
+        x, y = self.canvas.coords(tag)[:2]
+        col = round((x - self.x - self.box_width / 2) / self.step_x)
+        row = round((y - self.y - self.box_height / 2) / self.step_y)
+        return row * self.cols + col
+
+    def label(self, value):
+        """
+        :param value: cached value
+        :return: text shown in the slot
+        """
+        text = str(value)
+        return text if len(text) <= self.max_label else text[:self.max_label - 1] + "…"
+
+    def fill(self, elements):
+        """
+        Show values of a cache
+        :param elements: values from LRU to MRU
+        """
+        for value in elements[:self.size]:
+            self.insert(value)
+
+    def on_event(self, event, value):
+        """
+        Apply one cache event, usable as the listener of events.observe
+        :param event: events.INSERT, PROMOTE or EVICT
+        :param value: value concerned
+        """
+        if event == INSERT:
+            self.insert(value)
+        elif event == PROMOTE:
+            self.promote(value)
+        else:
+            self.remove(value)
+
+    def insert(self, value):
+        """
+        Show a new value in the first free slot (the MRU end)
+        :param value: inserted value
+        """
+        index = self.count
+        if self.spare:
+            tag = self.spare.pop()
+            self._move(tag, index)
+            self.canvas.itemconfig(tag, text=self.label(value), state=NORMAL)
+            self.canvas.addtag_withtag("value", tag)
+        else:
+            tag = f"v{self.serial}"
+            self.serial += 1
+            x, y = self.center(index)
+            self.draw_value(x, y, self.label(value), (tag, "value"))
+
+        self.values[value] = tag
+        self.canvas.itemconfig(f"slot{index}", state=NORMAL)
+        self._set_count(index + 1)
+
+    def promote(self, value):
+        """
+        Move a value to the MRU end
+        :param value: promoted value
+        """
+        tag = self.values[value]
+        index = self.slot_of(tag)
+        if index == self.count - 1:
+            return
+
+        self._close_gap(index)
+        self._move(tag, self.count - 1)
+
+    def remove(self, value):
+        """
+        Take a value out of the view
+        :param value: evicted value
+        """
+        tag = self.values.pop(value)
+        index = self.slot_of(tag)
+        self.canvas.itemconfig(tag, state=HIDDEN)
+        self.canvas.dtag(tag, "value")
+        self.spare.append(tag)
+
+        self._close_gap(index)
+        self.canvas.itemconfig(f"slot{self.count - 1}", state=HIDDEN)
+        self._set_count(self.count - 1)
+
+    def _move(self, tag, index):
+        """
+        Move items of a value to a slot
+        :param tag: tag of the items
+        :param index: target slot
+        """
+        x, y = self.center(index)
+        old_x, old_y = self.center(self.slot_of(tag))
+        self.canvas.move(tag, x - old_x, y - old_y)
+
+    def _shift(self, first, last, dx, dy):
+        """
+        Move values in slots first .. last of one row
+        """
+        x1, y = self.center(first)
+        x2, _ = self.center(last)
+        self.canvas.addtag_overlapping("shift", x1 - 1, y - 1, x2 + 1, y + 1)
+        self.canvas.move("shift&&value", dx, dy)
+        self.canvas.dtag("shift")
+
+    def _close_gap(self, index):
+        """
+        Move values behind slot index back by one slot, row by row
+        :param index: slot left by a value
+        """
+        cols = self.cols
+        first = index + 1
+
+        while first < self.count:
+            row_start = first - first % cols
+            last = min(row_start + cols, self.count) - 1
+
+            if first == row_start:
+                # first slot of a row goes to the end of the row above
+                self._shift(first, first, (cols - 1) * self.step_x, -self.step_y)
+                first += 1
+
+            if first <= last:
+                self._shift(first, last, -self.step_x, 0)
+
+            first = last + 1
+
+    def _set_count(self, count):
+        """
+        Update the MRU marker and the empty cache items for a new number of values
+        :param count: new number of values
+        """
+        self.canvas.itemconfig(f"mru{self.count - 1}", state=HIDDEN)
+        if count > 1:
+            self.canvas.itemconfig(f"mru{count - 1}", state=NORMAL)
+        self.canvas.itemconfig("empty", state=HIDDEN if count else NORMAL)
+        self.count = count
@@ -0,0 +1,125 @@
+'''@package docstring
+CLOCK (second chance) engine: a HIT only sets a reference bit
+'''
+
+'''
+Values sit in a circular array of slots with one reference bit each.
+A HIT sets the bit - no list surgery at all. On a MISS with a full cache the
+hand sweeps the circle, clearing set bits (second chance) until it finds a slot
+with a clear bit; that value is evicted and the new one takes its slot.
+'''
+
+
+class ClockCache:
+    """ CLOCK cache with the same read/write/hits/misses interface as Cache """
+
+    def __init__(self, size):
+        """
+        Initialize cache with given size; slots and reference bits are preallocated.
+        :param size: maximum size of the cache
+        """
+        self.size = size
+        self.cache = dict()
+        self.keys = [None] * size
+        self.referenced = bytearray(size)
+        self.hand = 0
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+
+        slot = self.cache.get(value)
+
+        if slot is not None:
+            # HIT case - just give the value a second chance
+            self.hits += 1
+            self.referenced[slot] = 1
+            return True
+
+        # MISS case
+
+        self.misses += 1
+
+        if self.used < self.size:
+            # there is still a never used slot
+            slot = self.used
+            self.used += 1
+        else:
+            # sweep: clear reference bits until a slot without one is found
+            referenced = self.referenced
+            size = self.size
+            hand = self.hand
+            while referenced[hand]:
+                referenced[hand] = 0
+                hand += 1
+                if hand == size:
+                    hand = 0
+
+            slot = hand
+            del self.cache[self.keys[slot]]
+            self.evictions += 1
+            self.hand = hand + 1 if hand + 1 < size else 0
+
+        self.keys[slot] = value
+        self.cache[value] = slot
+
+        return False
+
+    def read(self, value):
+        """
+        Read value from the cache
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+
+        slot = self.cache.get(value)
+
+        if slot is not None:
+            # HIT case - just give the value a second chance
+            self.hits += 1
+            self.referenced[slot] = 1
+            return True
+
+        # MISS case - do nothing
+        self.misses += 1
+        return False
+
+    def get_elements(self):
+        """
+        Return cached values in clock order starting from the hand
+        :return: list of values
+        """
+        if self.used < self.size:
+            return self.keys[:self.used]
+        return self.keys[self.hand:] + self.keys[:self.hand]
+
+
+if __name__ == "__main__":
+    import time
+    from proj import Cache
+    from array_cache import ArrayCache
+    from traces import READ, zipf_ops
+
+    size = 10_000
+    ops = zipf_ops(1_000_000, 100_000, alpha=0.9, write_ratio=0.1)
+
+    print(f"Zipf 0.9, 90% READ, {len(ops)} ops, cache size {size}:")
+    for cache_class in (Cache, ArrayCache, ClockCache):
+        cache = cache_class(size)
+        read = cache.read
+        write = cache.write
+        start = time.perf_counter()
+        for op, key in ops:
+            if op == READ:
+                read(key)
+            else:
+                write(key)
+        elapsed = time.perf_counter() - start
+        print(f"    {cache_class.__name__:<12} hit ratio {cache.hits / len(ops):.4f}  {len(ops) / elapsed:12,.0f} ops/s")
@@ -0,0 +1,112 @@
+'''@package docstring
+Change events of a cache (insert, promote, evict) for displays that follow the cache instead of redrawing it
+'''
+
+'''
+observe(cache, listener) puts wrappers of read, write, evict and discard into
+the instance dictionary as a layer (see layers.py), the same way
+metrics.instrument does, so a cache nobody listens to runs the plain class
+methods and both can be switched off in any order. Every listener is called as
+listener(event, value) with
+
+    INSERT   value was added at the MRU end
+    PROMOTE  a HIT moved value to the MRU end
+    EVICT    value left the cache (evict(), also when resize() shrinks it, or
+             discard(), e.g. an expired TTLCache entry or a WeightedCache entry
+             rewritten heavier than the capacity)
+
+in the order the queue changed: a WRITE MISS on a full cache sends EVICT of the
+old value, then INSERT of the new one.
+
+Events describe the LRU queue of Cache and its subclasses (lru and lazy in
+policy.py); a HIT that LazyCache does not relink sends nothing. Other engines
+have no such queue, observe() returns False for them and a display has to be
+redrawn from get_elements() after every operation.
+'''
+
+from layers import pop_layer, push_layer
+from proj import Cache
+
+INSERT = "insert"
+PROMOTE = "promote"
+EVICT = "evict"
+
+
+def observe(cache, listener):
+    """
+    Send change events of a cache to a listener
+    :param cache: cache to observe
+    :param listener: function called with (event, value)
+    :return: True if the engine sends events, False if it has to be redrawn from get_elements()
+    """
+    if not isinstance(cache, Cache):
+        return False
+
+    listeners = vars(cache).get("listeners")
+    if listeners is not None:
+        listeners.append(listener)
+        return True
+
+    listeners = [listener]
+    read = cache.read
+    write = cache.write
+    evict = cache.evict
+    discard = cache.discard
+
+    def appended(value, hit):
+        # the value is at the MRU end only if the operation (re)linked it there
+        tail = cache.queue.tail
+        if tail is not None and tail.value == value:
+            event = PROMOTE if hit else INSERT
+            for listener in listeners:
+                listener(event, value)
+
+    def observed_read(value, *args, **kwargs):
+        hit = read(value, *args, **kwargs)
+        if hit:
+            appended(value, hit)
+        return hit
+
+    def observed_write(value, *args, **kwargs):
+        hit = write(value, *args, **kwargs)
+        appended(value, hit)
+        return hit
+
+    def observed_evict():
+        value = evict()
+        for listener in listeners:
+            listener(EVICT, value)
+        return value
+
+    def observed_discard(value):
+        removed = discard(value)
+        if removed:
+            for listener in listeners:
+                listener(EVICT, value)
+        return removed
+
+    push_layer(cache, listeners, {
+        "read": observed_read,
+        "write": observed_write,
+        "evict": observed_evict,
+        "discard": observed_discard,
+        "batch_evict": False,
+    })
+    cache.listeners = listeners
+    return True
+
+
+def unobserve(cache, listener):
+    """
+    Stop sending events to a listener; without listeners the methods observe() wrapped are used again
+    :param cache: observed cache
+    :param listener: listener given to observe()
+    """
+    listeners = vars(cache).get("listeners")
+    if listeners is None or listener not in listeners:
+        return
+
+    listeners.remove(listener)
+    if not listeners:
+        del vars(cache)["listeners"]
+        pop_layer(cache, listeners)
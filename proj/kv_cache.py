@@ -0,0 +1,227 @@
+'''@package docstring
+Key/value LRU cache with write-back of dirty entries
+'''
+
+from proj import Cache
+
+
+class WriteBackSink:
+    """ Collects dirty entries evicted from the cache and writes them to the backend in batches """
+
+    def __init__(self, backend, batch_size=64):
+        """
+        Initialize sink
+        :param backend: function called with a list of (key, payload) tuples
+        :param batch_size: number of entries collected before calling the backend
+        """
+        self.backend = backend
+        self.batch_size = batch_size
+        self.pending = []
+        self.entries = 0
+        self.batches = 0
+
+    def put(self, key, payload):
+        """
+        Queue one entry for writing
+        :param key: key of the entry
+        :param payload: payload of the entry
+        """
+        self.pending.append((key, payload))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def find(self, key):
+        """
+        Look up the newest queued payload of a key, O(batch_size)
+        :param key: key to look up
+        :return: (True, payload) if the key waits for writing, (False, None) otherwise
+        """
+        for queued, payload in reversed(self.pending):
+            if queued == key:
+                return True, payload
+        return False, None
+
+    def flush(self):
+        """
+        Write all queued entries to the backend in one call
+        """
+        if not self.pending:
+            return
+
+        self.backend(self.pending)
+        self.entries += len(self.pending)
+        self.batches += 1
+        self.pending = []
+
+
+class KVCache(Cache):
+    """ LRU cache storing a payload for every key; WRITE marks the entry dirty, dirty entries go to the sink on eviction """
+
+    def __init__(self, size, sink=None):
+        """
+        Initialize cache
+        :param size: maximum size of the cache
+        :param sink: WriteBackSink receiving dirty entries (None to drop them)
+        """
+        super().__init__(size)
+        self.data = dict()
+        self.dirty = set()
+        self.sink = sink
+        self.writes = 0
+
+    def write(self, key, payload=None, dirty=True):
+        """
+        Store payload under key and mark the entry dirty
+        :param key: key to write
+        :param payload: data to store
+        :param dirty: False when the payload came from the backend (fill), so it is not written back
+        :return: True if HIT, False if MISS
+        """
+        hit = super().write(key)
+        self.data[key] = payload
+
+        if dirty:
+            self.writes += 1
+            self.dirty.add(key)
+        else:
+            # the payload is the backend's now, an older dirty payload it replaced must not be written back
+            self.dirty.discard(key)
+
+        return hit
+
+    def get(self, key, default=None):
+        """
+        Read payload stored under key
+        :param key: key to read
+        :param default: value returned on MISS
+        :return: payload if HIT, default if MISS
+        """
+        if self.read(key):
+            return self.data[key]
+        return default
+
+    def peek(self, key, default=None):
+        """
+        Read payload stored under key without promoting it and without counting a HIT or MISS
+        :param key: key to read
+        :param default: value returned if the key is not cached
+        :return: payload or default
+        """
+        return self.data.get(key, default)
+
+    def evict(self):
+        """
+        Remove the least recently used entry, handing it to the sink if it is dirty
+        :return: removed key
+        """
+        key = super().evict()
+        self._release(key)
+        return key
+
+    def discard(self, key):
+        """
+        Remove an entry from any position, handing it to the sink if it is dirty
+        :param key: key to remove, a key that is not cached is ignored
+        :return: True if the key was cached
+        """
+        if not super().discard(key):
+            return False
+
+        self._release(key)
+        return True
+
+    def _release(self, key):
+        """
+        Drop the payload of a key that left the cache; a dirty payload goes to the sink
+        :param key: removed key
+        """
+        payload = self.data.pop(key)
+
+        if key in self.dirty:
+            self.dirty.remove(key)
+            if self.sink is not None:
+                self.sink.put(key, payload)
+
+    def flush(self):
+        """
+        Write back all dirty entries (e.g. before shutdown); entries stay in the cache as clean
+        """
+        if self.sink is not None:
+            node = self.queue.head
+            while node:
+                if node.value in self.dirty:
+                    self.sink.put(node.value, self.data[node.value])
+                node = node.next
+            self.sink.flush()
+
+        self.dirty.clear()
+
+    def reset(self):
+        """
+        Remove all entries and reset counters; dirty entries are dropped, flush() first to keep them
+        """
+        super().reset()
+        self.data = dict()
+        self.dirty = set()
+        self.writes = 0
+
+    def _payloads(self, keys):
+        """
+        Payloads and dirty flags saved with the snapshot
+        :param keys: cached keys from LRU to MRU
+        :return: list of (payload, dirty) in the order of keys
+        """
+        data = self.data
+        dirty = self.dirty
+        return [(data[key], key in dirty) for key in keys]
+
+    def _restore(self, keys, payloads):
+        """
+        Fill an empty cache from a snapshot; dirty entries stay dirty, so they are still written back
+        :param keys: keys from LRU to MRU
+        :param payloads: (payload, dirty) in the order of keys, or None
+        """
+        super()._restore(keys, payloads)
+        if payloads is None:
+            self.data = dict.fromkeys(keys)
+            return
+
+        self.data = {key: payload for key, (payload, _) in zip(keys, payloads)}
+        self.dirty = {key for key, (_, dirty) in zip(keys, payloads) if dirty}
+
+    def write_back_savings(self):
+        """
+        Compare backend traffic of write-back with write-through (one backend write per WRITE)
+        :return: dict with write_through, write_back, saved and batches
+        """
+        written = self.sink.entries + len(self.sink.pending) if self.sink is not None else 0
+
+        return {
+            "write_through": self.writes,
+            "write_back": written,
+            "saved": self.writes - written,
+            "batches": self.sink.batches if self.sink is not None else 0,
+        }
+
+
+if __name__ == "__main__":
+    from traces import READ, zipf_ops
+
+    store = dict()
+
+    def backend(entries):
+        store.update(entries)
+
+    cache = KVCache(1_000, WriteBackSink(backend, batch_size=64))
+    for op, key in zipf_ops(500_000, 20_000, alpha=0.9, write_ratio=0.5):
+        if op == READ:
+            cache.get(key)
+        else:
+            cache.write(key, f"payload {key}")
+    cache.flush()
+
+    stats = cache.write_back_savings()
+    print(f"HITS: {cache.hits}, MISSES: {cache.misses}")
+    print(f"Backend writes: write-through {stats['write_through']}, write-back {stats['write_back']} "
+          f"in {stats['batches']} batches, saved {stats['saved']}")
@@ -0,0 +1,78 @@
+'''@package docstring
+Stack of instance-level wrappers of a cache, so that metrics.instrument and events.observe can be removed in any order
+'''
+
+'''
+A layer puts attributes (wrapped read/write/evict, batch_evict) into the
+instance dictionary and remembers what was there before: the wrappers of the
+layer below or nothing (the class methods). The wrappers of a layer call the
+methods they found, so the layers form a chain.
+
+Removing the top layer restores the attributes it saved. A layer with others
+above it cannot be cut out of the chain, because their wrappers call its
+wrappers; it is only marked removed and taken out together with the layers
+above it once they are gone. Until then its wrappers keep running for the
+layers above.
+'''
+
+MISSING = object()
+
+
+class Layer:
+    """ Attributes one owner put into the instance dictionary and the ones they shadow """
+
+    def __init__(self, owner, attributes, saved):
+        """
+        Initialize layer
+        :param owner: object identifying the layer (Metrics, list of listeners)
+        :param attributes: dict name -> value put into the instance dictionary
+        :param saved: dict name -> previous value in the instance dictionary, MISSING if there was none
+        """
+        self.owner = owner
+        self.attributes = attributes
+        self.saved = saved
+        self.removed = False
+
+
+def push_layer(obj, owner, attributes):
+    """
+    Put attributes into the instance dictionary on top of the ones already there
+    :param obj: cache
+    :param owner: object identifying the layer, passed to pop_layer
+    :param attributes: dict name -> value
+    """
+    own = vars(obj)
+    saved = {name: own.get(name, MISSING) for name in attributes}
+    own.setdefault("layers", []).append(Layer(owner, attributes, saved))
+    own.update(attributes)
+
+
+def pop_layer(obj, owner):
+    """
+    Remove the layer of an owner; the attributes below it come back as soon as no layer above it is left
+    :param obj: cache
+    :param owner: object given to push_layer
+    :return: True if the owner had a layer
+    """
+    own = vars(obj)
+    layers = own.get("layers", [])
+
+    for layer in layers:
+        if layer.owner is owner and not layer.removed:
+            layer.removed = True
+            break
+    else:
+        return False
+
+    while layers and layers[-1].removed:
+        layer = layers.pop()
+        for name, value in layer.saved.items():
+            if value is MISSING:
+                own.pop(name, None)
+            else:
+                own[name] = value
+
+    if not layers:
+        own.pop("layers", None)
+
+    return True
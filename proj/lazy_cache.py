@@ -0,0 +1,150 @@
+'''@package docstring
+LRU cache with lazy promotion: a HIT near the MRU end does not relink the node
+'''
+
+'''
+Every append to the queue (insert or promotion) increases clock and stamps the
+new node with it. When a value is hit, clock - node.stamp is the number of
+appends since the node itself was appended, so at most that many nodes are
+newer than it. If that is less than fraction * size, the value is still in the
+newest part of the queue and the HIT leaves the list alone; it will be
+promoted again once it drifts further back. fraction=0 gives plain LRU.
+'''
+
+from proj import Cache
+
+
+class LazyCache(Cache):
+    """ Cache whose HITs only promote values that are not among the fraction * size most recent """
+
+    def __init__(self, size, fraction=0.25):
+        """
+        Initialize cache
+        :param size: maximum size of the cache
+        :param fraction: part of the queue at the MRU end where HITs are not promoted (0 .. 1)
+        """
+        super().__init__(size)
+        self.fraction = fraction
+        self.window = int(size * fraction)
+        self.clock = 0
+        self.skipped = 0
+
+    def _append(self, value):
+        """
+        Put value at the MRU end and stamp its node
+        :param value: value to append
+        """
+        self.clock += 1
+        node = self.queue.append(value)
+        node.stamp = self.clock
+        self.cache[value] = node
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+        node = self.cache.get(value)
+
+        if node is not None:
+            # HIT case - relink only if the value drifted out of the newest window
+            self.hits += 1
+            if self.clock - node.stamp < self.window:
+                self.skipped += 1
+            else:
+                self.queue.pop(node)
+                self._append(value)
+            return True
+
+        # MISS case
+        self.misses += 1
+
+        if len(self.cache) >= self.size:
+            self.evict()
+
+        self._append(value)
+
+        return False
+
+    def read(self, value):
+        """
+        Read value from the cache
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+        node = self.cache.get(value)
+
+        if node is not None:
+            # HIT case - relink only if the value drifted out of the newest window
+            self.hits += 1
+            if self.clock - node.stamp < self.window:
+                self.skipped += 1
+            else:
+                self.queue.pop(node)
+                self._append(value)
+            return True
+
+        # MISS case - do nothing
+        self.misses += 1
+        return False
+
+    def resize(self, new_size):
+        """
+        Change size of the cache keeping its content, the lazy window follows the size
+        :param new_size: new maximum size of the cache
+        :return: list of evicted values from LRU to MRU
+        """
+        self.window = int(new_size * self.fraction)
+        return super().resize(new_size)
+
+    def reset(self):
+        """
+        Remove all values and reset counters
+        """
+        super().reset()
+        self.clock = 0
+        self.skipped = 0
+
+    def _restore(self, keys, payloads):
+        """
+        Fill an empty cache from a snapshot, stamping the nodes in LRU order
+        :param keys: values from LRU to MRU
+        :param payloads: not used
+        """
+        for value in keys:
+            self._append(value)
+
+
+if __name__ == "__main__":
+    import time
+    from traces import zipf_ops
+
+    size = 1_000
+
+    def measure(caches, ops, rounds=5):
+        """ best ops/s of every cache, rounds interleaved so that machine noise hits all of them alike """
+        best = [0] * len(caches)
+        for _ in range(rounds):
+            for i, cache in enumerate(caches):
+                cache.reset()
+                start = time.perf_counter()
+                cache.replay(ops)
+                best[i] = max(best[i], len(ops) / (time.perf_counter() - start))
+        return best
+
+    fractions = (0.1, 0.25, 0.5)
+
+    for alpha in (0.8, 1.0, 1.2):
+        ops = zipf_ops(500_000, 50_000, alpha=alpha)
+        caches = [Cache(size)] + [LazyCache(size, fraction) for fraction in fractions]
+        speeds = measure(caches, ops)
+        lru_ratio = caches[0].hits / len(ops)
+
+        print(f"Zipf {alpha}, 30% WRITE, {len(ops)} ops, cache size {size}:")
+        print(f"    {'LRU':<10} hit ratio {lru_ratio:.4f}  {speeds[0]:12,.0f} ops/s")
+        for fraction, cache, speed in zip(fractions, caches[1:], speeds[1:]):
+            ratio = cache.hits / len(ops)
+            print(f"    {f'lazy {fraction:.0%}':<10} hit ratio {ratio:.4f}  {speed:12,.0f} ops/s  "
+                  f"({100 * (ratio - lru_ratio):+.2f} pp, {100 * (speed / speeds[0] - 1):+.0f}% ops/s, "
+                  f"{cache.skipped / max(1, cache.hits):.0%} of HITs not relinked)")
@@ -0,0 +1,162 @@
+'''@package docstring
+O(1) LFU engine: frequency buckets, each an LRU Cache.Queue
+'''
+
+'''
+Every access count f has its own bucket - a Cache.Queue with values of that
+count from LRU to MRU. A HIT moves the value from bucket f to the MRU end of
+bucket f + 1, eviction takes the LRU value of the lowest non-empty bucket,
+so ties between equally frequent values are broken by LRU. All of it is O(1).
+
+With decay_every set, all counts are halved after that many accesses so that
+popularity from long ago fades; this is O(size) but happens once per
+decay_every accesses, so it stays amortized O(1) when decay_every >= size.
+'''
+
+from proj import Cache
+
+
+class LFUCache:
+    """ LFU cache with the same read/write/hits/misses interface as Cache """
+
+    def __init__(self, size, decay_every=None):
+        """
+        Initialize cache
+        :param size: maximum size of the cache
+        :param decay_every: number of accesses between halving all counts (None for no decay)
+        """
+        self.size = size
+        self.decay_every = decay_every
+        self.buckets = dict()       # count -> Cache.Queue
+        self.cache = dict()         # value -> (count, node)
+        self.min_count = 0
+        self.accesses = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _append(self, count, value):
+        """
+        Put value at the MRU end of the bucket for count
+        :param count: access count of the value
+        :param value: value to append
+        """
+        bucket = self.buckets.get(count)
+        if bucket is None:
+            bucket = self.buckets[count] = Cache.Queue()
+        self.cache[value] = (count, bucket.append(value))
+
+    def _unlink(self, count, node):
+        """
+        Remove node from the bucket for count, dropping the bucket if it became empty
+        :param count: access count of the value
+        :param node: node of the value
+        """
+        bucket = self.buckets[count]
+        bucket.pop(node)
+
+        if bucket.head is None:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+
+    def _access(self):
+        """
+        Count one access and decay the counts if it is time to
+        """
+        self.accesses += 1
+        if self.decay_every and self.accesses % self.decay_every == 0:
+            self.decay()
+
+    def _hit(self, value):
+        """
+        Check for a HIT and move the value to the next bucket
+        :param value: referenced value
+        :return: True if HIT, False if MISS
+        """
+        self._access()
+        entry = self.cache.get(value)
+
+        if entry is None:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        count, node = entry
+        self._unlink(count, node)
+        self._append(count + 1, value)
+
+        return True
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+        if self._hit(value):
+            return True
+
+        if len(self.cache) >= self.size:
+            # cache is full, remove the LRU value of the least frequent bucket
+            oldest = self.buckets[self.min_count].pop_head()
+            if self.buckets[self.min_count].head is None:
+                del self.buckets[self.min_count]
+            del self.cache[oldest]
+            self.evictions += 1
+
+        self._append(1, value)
+        self.min_count = 1
+
+        return False
+
+    def read(self, value):
+        """
+        Read value from the cache
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+        return self._hit(value)
+
+    def decay(self):
+        """
+        Halve all access counts (at least 1); values merged into one bucket keep LRU order by old count
+        """
+        old_buckets = self.buckets
+        self.buckets = dict()
+
+        for count in sorted(old_buckets):
+            for value in old_buckets[count].to_list():
+                self._append(max(1, count // 2), value)
+
+        self.min_count = min(self.buckets) if self.buckets else 0
+
+    def get_elements(self):
+        """
+        Return cached values from the next victim on: by count, LRU to MRU within a count
+        :return: list of values
+        """
+        return [value for count in sorted(self.buckets) for value in self.buckets[count].to_list()]
+
+
+if __name__ == "__main__":
+    from traces import scan_keys, zipf_keys
+
+    workloads = (
+        ("Zipf 0.8", zipf_keys(300_000, 50_000, alpha=0.8)),
+        ("Zipf 0.8 + scans", scan_keys(300_000, 50_000, alpha=0.8)),
+    )
+    engines = (("LRU", lambda size: Cache(size)),
+               ("LFU", lambda size: LFUCache(size)),
+               ("LFU decay", lambda size: LFUCache(size, decay_every=10 * size)))
+
+    print("Hit ratio (every access is a WRITE):")
+    for name, keys in workloads:
+        for size in (500, 5_000):
+            columns = []
+            for engine, make in engines:
+                cache = make(size)
+                for key in keys:
+                    cache.write(key)
+                columns.append(f"{engine} {cache.hits / len(keys):.4f}")
+            print(f"    {name:<18} size {size:<6} " + "  ".join(columns))
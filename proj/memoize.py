@@ -0,0 +1,274 @@
+'''@package docstring
+Memoization decorator backed by the project's cache engines
+'''
+
+'''
+The engines only track keys, so results are kept in a dict next to them and
+the engine decides what stays: a call is a HIT only if the engine reads the
+key as a HIT, otherwise the function runs and the key is written. Results of
+keys the engine has evicted are dropped lazily - whenever the dict doubles
+past the number of live keys it is rebuilt from engine.get_elements(), which
+is O(1) amortized and works with every registered policy. The engines are
+bounded by count, so they hold min(len(values), maxsize) keys.
+
+With weigher set the engine is a WeightedCache and maxsize is a capacity in
+bytes; each result is written with weigher(result) as its weight. Lazy
+dropping would let many light stale results outweigh the capacity, so this
+engine keeps the results itself and drops each one when its key is evicted.
+
+As with functools.lru_cache, maxsize=None caches without bound (a plain dict,
+no engine) and maxsize <= 0 caches nothing.
+'''
+
+import threading
+from collections import namedtuple
+
+from policy import DEFAULT_POLICY, make_cache
+from weighted_cache import WeightedCache
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _WeightedResults(WeightedCache):
+    """ WeightedCache keeping the result of every cached key, dropped together with the key """
+
+    def __init__(self, size):
+        """
+        Initialize cache
+        :param size: capacity in bytes
+        """
+        super().__init__(size)
+        self.results = dict()
+
+    def store(self, key, result, weight):
+        """
+        Write a key and keep its result
+        :param key: key of the call
+        :param result: result of the call
+        :param weight: weight of the result in bytes
+        """
+        self.write(key, weight)
+
+        if key in self.cache:
+            self.results[key] = result
+        else:
+            # heavier than the whole capacity, the engine did not keep the key
+            self.results.pop(key, None)
+
+    def evict(self):
+        """
+        Remove the least recently used key and its result
+        :return: removed key
+        """
+        key = super().evict()
+        del self.results[key]
+        return key
+
+''' separates positional from keyword arguments in a key '''
+_KWD_MARK = object()
+
+''' argument types that are their own key when they are the only argument '''
+_FAST_TYPES = {int, str}
+
+
+def _make_key(args, kwargs, typed):
+    """
+    Build a hashable key from call arguments
+    :param args: positional arguments
+    :param kwargs: keyword arguments
+    :param typed: add argument types, so f(1) and f(1.0) are cached separately
+    :return: key
+    """
+    if not kwargs and not typed and len(args) == 1 and type(args[0]) in _FAST_TYPES:
+        return args[0]
+
+    key = args
+    if kwargs:
+        key += (_KWD_MARK,)
+        for item in kwargs.items():
+            key += item
+    if typed:
+        key += tuple(type(arg) for arg in args)
+        if kwargs:
+            key += tuple(type(value) for value in kwargs.values())
+
+    return key
+
+
+def _plain_memoize(function, maxsize, typed):
+    """
+    Wrap a function without a cache engine: maxsize None caches every result, maxsize <= 0 none
+    :param function: function to wrap
+    :param maxsize: None or a number <= 0
+    :param typed: cache arguments of different types separately
+    :return: wrapper with cache_info and cache_clear
+    """
+    values = dict()
+    lock = threading.Lock()
+    stats = [0, 0]      # hits, misses
+    bounded = maxsize is not None
+
+    def wrapper(*args, **kwargs):
+        if bounded:
+            with lock:
+                stats[1] += 1
+            return function(*args, **kwargs)
+
+        key = _make_key(args, kwargs, typed)
+
+        with lock:
+            if key in values:
+                stats[0] += 1
+                return values[key]
+            stats[1] += 1
+
+        result = function(*args, **kwargs)
+
+        with lock:
+            values[key] = result
+
+        return result
+
+    def cache_info():
+        """
+        Report cache statistics
+        :return: CacheInfo(hits, misses, maxsize, currsize)
+        """
+        with lock:
+            return CacheInfo(stats[0], stats[1], 0 if bounded else None, len(values))
+
+    def cache_clear():
+        """ Remove all results and reset statistics """
+        with lock:
+            values.clear()
+            stats[:] = [0, 0]
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    wrapper.__wrapped__ = function
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+
+    return wrapper
+
+
+def lru_memoize(maxsize=128, typed=False, policy=DEFAULT_POLICY, weigher=None):
+    """
+    Decorator caching results of a pure function
+    :param maxsize: maximum number of cached results (bytes if weigher is set), None for no limit, 0 for no caching
+    :param typed: cache arguments of different types separately
+    :param policy: registered policy name (see policy.py) deciding what to evict
+    :param weigher: function returning weight of a result in bytes; switches to a byte-bounded WeightedCache
+    :return: decorator
+    """
+
+    def decorator(function):
+        if maxsize is None or maxsize <= 0:
+            return _plain_memoize(function, maxsize, typed)
+
+        engine = _WeightedResults(maxsize) if weigher is not None else make_cache(policy, maxsize)
+        values = engine.results if weigher is not None else dict()
+        lock = threading.Lock()
+        stats = [0, 0]      # hits, misses
+        limit = [64]        # len(values) triggering the next cleanup
+
+        def prune():
+            """ Drop results of keys the engine no longer holds """
+            nonlocal values
+            values = {key: values[key] for key in engine.get_elements()}
+            limit[0] = 2 * len(values) + 64
+
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs, typed)
+
+            with lock:
+                if engine.read(key):
+                    stats[0] += 1
+                    return values[key]
+                stats[1] += 1
+
+            # the call runs outside the lock, concurrent MISSes of one key may both compute it
+            result = function(*args, **kwargs)
+
+            with lock:
+                if weigher is not None:
+                    engine.store(key, result, weigher(result))
+                else:
+                    engine.write(key)
+                    values[key] = result
+                    if len(values) > limit[0]:
+                        prune()
+
+            return result
+
+        def cache_info():
+            """
+            Report cache statistics
+            :return: CacheInfo(hits, misses, maxsize, currsize)
+            """
+            with lock:
+                currsize = len(values) if weigher is not None else min(len(values), maxsize)
+                return CacheInfo(stats[0], stats[1], maxsize, currsize)
+
+        def cache_clear():
+            """ Remove all results and reset statistics """
+            nonlocal engine, values
+            with lock:
+                engine = _WeightedResults(maxsize) if weigher is not None else make_cache(policy, maxsize)
+                values = engine.results if weigher is not None else dict()
+                stats[:] = [0, 0]
+                limit[0] = 64
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.__wrapped__ = function
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    import functools
+    import time
+    from traces import scan_keys, zipf_keys
+
+    def work(key):
+        return f"result of {key}" * 4
+
+    def measure(wrapped, keys):
+        start = time.perf_counter()
+        for key in keys:
+            wrapped(key)
+        elapsed = time.perf_counter() - start
+        info = wrapped.cache_info()
+        return info.hits / len(keys), len(keys) / elapsed
+
+    size = 1_000
+    workloads = (
+        ("Zipf 0.9", zipf_keys(300_000, 50_000, alpha=0.9)),
+        ("Zipf 0.8 + scans", scan_keys(300_000, 50_000, alpha=0.8)),
+    )
+    contenders = [("functools.lru_cache", lambda: functools.lru_cache(maxsize=size)(work))]
+    contenders += [(f"lru_memoize {name}", lambda name=name: lru_memoize(size, policy=name)(work))
+                   for name in ("lru", "arc", "tinylfu")]
+
+    for workload, keys in workloads:
+        print(f"{workload}, {len(keys)} calls, maxsize {size}:")
+        for name, make in contenders:
+            hit_ratio, calls_per_second = measure(make(), keys)
+            print(f"    {name:<22} hit ratio {hit_ratio:.4f}  {calls_per_second:12,.0f} calls/s")
+
+    # results of very different sizes: to bound memory, lru_cache must assume every result is the largest
+    def sized(key):
+        return "x" * (100 if key % 10 else 50_000)
+
+    keys = zipf_keys(200_000, 20_000, alpha=0.9)
+    budget = 5_000_000
+    print(f"Results of 100 B or 50 kB, {len(keys)} calls, memory bound {budget // 1000} kB:")
+    for name, wrapped in ((f"lru_cache maxsize={budget // 50_000}", functools.lru_cache(maxsize=budget // 50_000)(sized)),
+                          ("lru_memoize bytes", lru_memoize(budget, weigher=len)(sized))):
+        hit_ratio, calls_per_second = measure(wrapped, keys)
+        print(f"    {name:<22} hit ratio {hit_ratio:.4f}  {calls_per_second:12,.0f} calls/s")
@@ -0,0 +1,250 @@
+'''@package docstring
+Optional instrumentation of a cache: READ/WRITE hit and miss counters, evictions, sliding-window hit ratio, sampled latency
+'''
+
+'''
+instrument(cache) puts wrappers of read, write and evict into the instance
+dictionary, where they shadow the class methods (or the wrappers of
+events.observe); uninstrument(cache) takes them out again (see layers.py). A
+cache that was never instrumented runs the plain class methods,
+so switched off instrumentation costs nothing. (After uninstrument CPython 3.11
+keeps the instance dictionary in its slower combined layout, so attribute access
+of that one cache stays 20-40% slower; build a new cache if it matters.)
+
+Evictions are counted by the evict wrapper; engines without evict() (array,
+clock, arc, lfu, tinylfu, fifo) count their own evictions, which the metrics
+take from the engine relative to the count at instrument().
+
+Only every sample_every-th operation is timed; latencies go to a histogram with
+power of two buckets in nanoseconds (bucket b counts latencies < 2 ** b ns).
+'''
+
+import time
+
+from layers import pop_layer, push_layer
+from traces import READ, WRITE
+
+''' number of latency buckets, 2 ** 40 ns is about 18 minutes '''
+BUCKETS = 40
+
+
+class Metrics:
+    """ Counters filled by an instrumented cache """
+
+    def __init__(self, window=1_000, sample_every=64):
+        """
+        Initialize empty metrics
+        :param window: number of recent operations in the sliding-window hit ratio
+        :param sample_every: time one operation out of this many
+        """
+        self.read_hits = 0
+        self.read_misses = 0
+        self.write_hits = 0
+        self.write_misses = 0
+        self.evictions = None       # stays None for engines that neither have evict() nor count evictions
+        self.engine = None          # engine counting its own evictions
+        self.engine_evictions = 0   # its count when instrumented
+        self.window = bytearray(window)
+        self.window_pos = 0
+        self.window_hits = 0
+        self.sample_every = sample_every
+        self.countdown = sample_every
+        self.latency = {READ: [0] * BUCKETS, WRITE: [0] * BUCKETS}
+
+    def follow(self, engine):
+        """
+        Take evictions from the counter of an engine that has no evict() to wrap
+        :param engine: cache with an evictions counter
+        """
+        self.engine = engine
+        self.engine_evictions = engine.evictions
+        self.evictions = 0
+
+    def update(self):
+        """
+        Bring evictions up to date with the counter of a followed engine
+        """
+        if self.engine is not None:
+            self.evictions = self.engine.evictions - self.engine_evictions
+
+    def sample(self, op, nanoseconds):
+        """
+        Add one timed operation to the latency histogram
+        :param op: READ or WRITE
+        :param nanoseconds: duration of the operation
+        """
+        self.latency[op][min(nanoseconds.bit_length(), BUCKETS - 1)] += 1
+
+    @staticmethod
+    def _percentile(histogram, fraction):
+        """
+        Estimate a percentile from a histogram
+        :param histogram: list of counts per power of two bucket
+        :param fraction: percentile as a fraction (0.99 for p99)
+        :return: upper bound of the bucket holding the percentile in ns, None if there are no samples
+        """
+        total = sum(histogram)
+        if not total:
+            return None
+
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if seen >= fraction * total:
+                return 1 << bucket
+
+    def snapshot(self):
+        """
+        Export all metrics as a plain dict (cheap, suitable for periodic scraping)
+        :return: dict of counters, ratios and latency histograms
+        """
+        self.update()
+        hits = self.read_hits + self.write_hits
+        total = hits + self.read_misses + self.write_misses
+        latency = dict()
+
+        for op, name in ((READ, "read"), (WRITE, "write")):
+            histogram = self.latency[op]
+            latency[name] = {
+                "samples": sum(histogram),
+                "p50_ns": self._percentile(histogram, 0.5),
+                "p99_ns": self._percentile(histogram, 0.99),
+                "histogram": {1 << bucket: count for bucket, count in enumerate(histogram) if count},
+            }
+
+        return {
+            "read_hits": self.read_hits,
+            "read_misses": self.read_misses,
+            "write_hits": self.write_hits,
+            "write_misses": self.write_misses,
+            "evictions": self.evictions,
+            "hit_ratio": hits / total if total else 0.0,
+            "window_hit_ratio": self.window_hits / min(total, len(self.window)) if total else 0.0,
+            "latency": latency,
+        }
+
+
+def instrument(cache, window=1_000, sample_every=64):
+    """
+    Switch instrumentation on
+    :param cache: Cache or any engine with the same interface
+    :param window: number of recent operations in the sliding-window hit ratio
+    :param sample_every: time one operation out of this many
+    :return: Metrics of the cache (also available as cache.metrics)
+    """
+    if "metrics" in vars(cache):
+        return cache.metrics
+
+    metrics = Metrics(window, sample_every)
+    clock = time.perf_counter_ns
+    read = cache.read
+    write = cache.write
+    window = metrics.window
+    window_size = len(window)
+
+    def instrumented_read(value, *args, **kwargs):
+        metrics.countdown -= 1
+        if metrics.countdown:
+            hit = read(value, *args, **kwargs)
+        else:
+            metrics.countdown = sample_every
+            start = clock()
+            hit = read(value, *args, **kwargs)
+            metrics.sample(READ, clock() - start)
+
+        if hit:
+            metrics.read_hits += 1
+        else:
+            metrics.read_misses += 1
+
+        # sliding window: replace the oldest result with this one
+        pos = metrics.window_pos
+        metrics.window_hits += hit - window[pos]
+        window[pos] = hit
+        metrics.window_pos = pos + 1 if pos + 1 < window_size else 0
+
+        return hit
+
+    def instrumented_write(value, *args, **kwargs):
+        metrics.countdown -= 1
+        if metrics.countdown:
+            hit = write(value, *args, **kwargs)
+        else:
+            metrics.countdown = sample_every
+            start = clock()
+            hit = write(value, *args, **kwargs)
+            metrics.sample(WRITE, clock() - start)
+
+        if hit:
+            metrics.write_hits += 1
+        else:
+            metrics.write_misses += 1
+
+        # sliding window: replace the oldest result with this one
+        pos = metrics.window_pos
+        metrics.window_hits += hit - window[pos]
+        window[pos] = hit
+        metrics.window_pos = pos + 1 if pos + 1 < window_size else 0
+
+        return hit
+
+    wrappers = {"read": instrumented_read, "write": instrumented_write}
+
+    if hasattr(cache, "evict"):
+        evict = cache.evict
+        metrics.evictions = 0
+
+        def instrumented_evict():
+            metrics.evictions += 1
+            return evict()
+
+        wrappers["evict"] = instrumented_evict
+        wrappers["batch_evict"] = False
+    elif hasattr(cache, "evictions"):
+        metrics.follow(cache)
+
+    push_layer(cache, metrics, wrappers)
+    cache.metrics = metrics
+    return metrics
+
+
+def uninstrument(cache):
+    """
+    Switch instrumentation off, the methods it wrapped are used again
+    :param cache: instrumented cache
+    :return: final Metrics, None if the cache was not instrumented
+    """
+    metrics = vars(cache).pop("metrics", None)
+    if metrics is not None:
+        pop_layer(cache, metrics)
+        metrics.update()
+        metrics.engine = None
+
+    return metrics
+
+
+if __name__ == "__main__":
+    from pprint import pprint
+    from proj import Cache
+    from traces import zipf_ops
+
+    ops = zipf_ops(500_000, 20_000, alpha=0.9)
+    size = 1_000
+
+    print(f"Zipf 0.9, 30% WRITE, {len(ops)} ops, cache size {size}, best of 3:")
+    for name, setup in (("plain", lambda cache: None),
+                        ("instrumented", instrument),
+                        ("switched off", lambda cache: (instrument(cache), uninstrument(cache)))):
+        best = 0
+        for _ in range(3):
+            cache = Cache(size)
+            setup(cache)
+            start = time.perf_counter()
+            cache.replay(ops)
+            best = max(best, len(ops) / (time.perf_counter() - start))
+        print(f"    {name:<14} {best:12,.0f} ops/s")
+
+    cache = Cache(size)
+    metrics = instrument(cache)
+    cache.replay(ops)
+    pprint(metrics.snapshot(), sort_dicts=False)
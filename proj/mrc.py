@@ -0,0 +1,512 @@
+'''@package docstring
+Single pass miss ratio curve of the LRU cache for every size from 1 to N
+'''
+
+'''
+Why the classic Mattson stack does not work here:
+Cache.read does not insert on a MISS. A READ of a value sitting at depth d
+is a HIT for every size >= d and a no-op for every smaller size, so it can
+not simply be moved to the top of one shared stack.
+
+What is used instead:
+For every value we remember the time of its last "touch" (WRITE or READ HIT)
+and the depth h of that touch (1 for WRITE, d for a READ that hit at depth d).
+Value x with touch (T_x, h_x) is in the cache of size C if and only if
+
+    C >= h_x  and  #{ y : T_y > T_x and h_y <= C } < C
+
+so the depth of x (the smallest size where it hits) is the smallest C >= h_x
+satisfying the inequality. Touches with h = 1 are counted with a Fenwick tree
+over timestamps in O(log n), deeper ones with a two dimensional Fenwick tree
+over (timestamp, depth) in O(log n * log N). Timestamps are renumbered
+when the tree is full, so memory depends on the number of distinct values,
+not on the length of the trace.
+
+Approximate curves (SHARDS, spatially hashed sampling):
+Only values whose hash falls below a threshold are simulated, i.e. a fixed
+fraction R of the distinct values with all of their operations. The hash does
+not change between runs, so a trace always gives the same sample. The sampled
+values behave like a cache R times smaller, so a HIT at size d of the sample
+is a HIT at size d / R of the whole trace. With max_keys set, the threshold is
+lowered whenever the sample grows past max_keys values (the values above the
+new threshold are forgotten), which keeps memory constant for any trace.
+The sample is split into groups by other hash bits; every group is an
+independent estimate, the result is their mean and the error bound is two
+standard errors of the mean. One sampled value stands for groups / R values,
+so sizes below that are not resolved. The difference between the real number
+of operations and the sampled estimate is counted as HITs of the smallest size
+(SHARDS_adj), which corrects most of the error caused by popular values.
+'''
+
+import heapq
+import math
+import zlib
+
+from traces import READ, WRITE, read_commands
+
+''' hash samples are compared in this range: threshold = rate * SAMPLE_RANGE '''
+SAMPLE_BITS = 24
+SAMPLE_RANGE = 1 << SAMPLE_BITS
+''' multiplier spreading Python hashes of small ints over all 64 bits '''
+MIXER = 0x9E3779B97F4A7C15
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _stable_hash(value):
+    """
+    Hash that is the same in every process (hash() of str and bytes is salted per process)
+    :param value: sampled value
+    :return: non-negative integer
+    """
+    if type(value) is int:
+        return value & MASK64
+    if type(value) is str:
+        value = value.encode("utf-8")
+    elif type(value) is not bytes:
+        value = repr(value).encode("utf-8")
+    return zlib.crc32(value)
+
+
+class Fenwick:
+    """ Fenwick (binary indexed) tree over positions 1 .. n """
+
+    def __init__(self, n):
+        """
+        Initialize tree with all counts equal to zero
+        :param n: number of positions
+        """
+        self.n = n
+        self.tree = [0] * (n + 1)
+
+    def add(self, i, delta):
+        """
+        Add delta to position i
+        :param i: position (1 .. n)
+        :param delta: value to add
+        """
+        tree = self.tree
+        n = self.n
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """
+        Sum of positions 1 .. i
+        :param i: last position of the prefix
+        :return: sum of the prefix
+        """
+        tree = self.tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+
+class Fenwick2D:
+    """ Sparse two dimensional Fenwick tree: positions 1 .. n, each holding counts for depths 1 .. m """
+
+    def __init__(self, n, m):
+        """
+        Initialize empty tree
+        :param n: number of positions (timestamps)
+        :param m: number of depths
+        """
+        self.n = n
+        self.m = m
+        self.tree = [None] * (n + 1)
+
+    def add(self, i, j, delta):
+        """
+        Add delta to the cell (i, j)
+        :param i: position (1 .. n)
+        :param j: depth (1 .. m)
+        :param delta: value to add
+        """
+        tree = self.tree
+        n = self.n
+        m = self.m
+        while i <= n:
+            row = tree[i]
+            if row is None:
+                row = tree[i] = dict()
+            k = j
+            while k <= m:
+                row[k] = row.get(k, 0) + delta
+                k += k & -k
+            i += i & -i
+
+    def prefix(self, i, j):
+        """
+        Sum of cells with position <= i and depth <= j
+        :param i: last position
+        :param j: last depth
+        :return: sum of the cells
+        """
+        tree = self.tree
+        total = 0
+        while i > 0:
+            row = tree[i]
+            if row is not None:
+                k = j
+                while k > 0:
+                    total += row.get(k, 0)
+                    k -= k & -k
+            i -= i & -i
+        return total
+
+
+class StackDistanceAnalyzer:
+    """ Computes HITS and MISSES of Cache(size) for all sizes 1 .. max_size in one pass over a trace """
+
+    def __init__(self, max_size):
+        """
+        Initialize analyzer
+        :param max_size: biggest cache size to report
+        """
+        self.max_size = max_size
+        self.deep = max_size + 1          # depth used for touches below every reported size
+        self.last = dict()                # value -> (timestamp, depth) of its last touch
+        self.distances = [0] * (max_size + 1)
+        self.accesses = 0
+        self._reset_trees(1024)
+
+    def _reset_trees(self, capacity):
+        """
+        Create empty trees for timestamps 1 .. capacity
+        :param capacity: number of timestamps before the next renumbering
+        """
+        self.time = 0
+        self.capacity = capacity
+        self.top = Fenwick(capacity)                       # touches with depth 1, by timestamp
+        self.pins = Fenwick2D(capacity, self.max_size)     # touches with depth 2 .. max_size
+        self.pins_by_depth = Fenwick(self.max_size)        # same touches, by depth only
+        self.pin_count = Fenwick(capacity)                 # same touches, by timestamp only
+        self.n_top = 0
+        self.n_pins = 0
+
+    def _insert(self, timestamp, depth, delta):
+        """
+        Add (delta=1) or remove (delta=-1) a touch from the trees
+        :param timestamp: time of the touch
+        :param depth: depth of the touch
+        :param delta: 1 or -1
+        """
+        if depth == 1:
+            self.top.add(timestamp, delta)
+            self.n_top += delta
+        elif depth <= self.max_size:
+            self.pins.add(timestamp, depth, delta)
+            self.pins_by_depth.add(depth, delta)
+            self.pin_count.add(timestamp, delta)
+            self.n_pins += delta
+
+    def _renumber(self):
+        """
+        Compact timestamps of the remembered touches to 1 .. number of values
+        """
+        entries = sorted(self.last.items(), key=lambda item: item[1][0])
+        self._reset_trees(max(1024, 2 * len(entries)))
+
+        for value, (_, depth) in entries:
+            self.time += 1
+            self.last[value] = (self.time, depth)
+            self._insert(self.time, depth, 1)
+
+    def _depth(self, timestamp, depth):
+        """
+        Find the smallest size for which the value touched at (timestamp, depth) is in the cache
+        :param timestamp: time of the last touch of the value
+        :param depth: depth of the last touch of the value
+        :return: size (1 .. max_size) or None if the value is deeper than max_size
+        """
+        if depth > self.max_size:
+            return None
+
+        newer_top = self.n_top - self.top.prefix(timestamp)
+        newer_pins = self.n_pins - self.pin_count.prefix(timestamp)
+
+        if newer_pins == 0:
+            # only WRITE touches are newer, plain LRU distance
+            size = max(depth, newer_top + 1)
+            return size if size <= self.max_size else None
+
+        size = depth
+        while size <= self.max_size:
+            newer = newer_top + self.pins_by_depth.prefix(size) - self.pins.prefix(timestamp, size)
+            if newer < size:
+                return size
+            # no size between size and newer can satisfy the condition
+            size = newer + 1
+
+        return None
+
+    def access(self, op, value):
+        """
+        Process one operation of the trace
+        :param op: READ or WRITE
+        :param value: value of the operation
+        :return: smallest cache size with a HIT, or None if it is a MISS for every size up to max_size
+        """
+        self.accesses += 1
+        entry = self.last.get(value)
+
+        if entry is None:
+            if op == READ:
+                # MISS everywhere, READ does not insert
+                return None
+            size = None
+        else:
+            size = self._depth(*entry)
+            self._insert(entry[0], entry[1], -1)
+            del self.last[value]
+
+        if size is not None:
+            self.distances[size] += 1
+
+        if self.time == self.capacity:
+            self._renumber()
+        self.time += 1
+
+        if op == WRITE:
+            depth = 1
+        else:
+            # READ HIT only refreshes the value in caches where it already was
+            depth = size if size is not None else self.deep
+
+        self.last[value] = (self.time, depth)
+        self._insert(self.time, depth, 1)
+
+        return size
+
+    def forget(self, value):
+        """
+        Remove a value as if it never appeared in the trace (used when a sample drops it)
+        :param value: value to remove
+        """
+        entry = self.last.pop(value, None)
+        if entry is not None:
+            self._insert(entry[0], entry[1], -1)
+
+    def process(self, ops):
+        """
+        Process a whole trace
+        :param ops: iterable of (op, value) tuples
+        :return: self
+        """
+        access = self.access
+        for op, value in ops:
+            access(op, value)
+        return self
+
+    def curve(self):
+        """
+        Compute results for every cache size
+        :return: list of (size, hits, misses) tuples for sizes 1 .. max_size
+        """
+        result = []
+        hits = 0
+
+        for size in range(1, self.max_size + 1):
+            hits += self.distances[size]
+            result.append((size, hits, self.accesses - hits))
+
+        return result
+
+
+class ShardsSample:
+    """ One spatially sampled stream of a trace, simulated by a StackDistanceAnalyzer at the sampling rate """
+
+    def __init__(self, max_size, rate, max_keys=None, groups=1):
+        """
+        Initialize sample
+        :param max_size: biggest cache size to report (of the whole trace)
+        :param rate: initial fraction of the group's values sampled (0 < rate <= 1)
+        :param max_keys: maximum number of sampled values (None for a fixed rate)
+        :param groups: number of groups the values are split into, this sample sees one of them
+        """
+        self.max_size = max_size
+        self.threshold = min(SAMPLE_RANGE, max(1, int(rate * SAMPLE_RANGE)))
+        self.max_keys = max_keys
+        self.groups = groups
+        scaled = math.ceil(max_size * rate / groups)
+        if max_keys is not None:
+            scaled = min(scaled, max_keys)
+        self.analyzer = StackDistanceAnalyzer(max(1, scaled))
+        self.hits = [0.0] * (max_size + 1)      # estimated HITs by smallest size
+        self.accesses = 0.0                     # estimated number of operations
+        self.tracked = []                       # heap of (-sample hash, value) of sampled values
+
+    def access(self, op, value, sample):
+        """
+        Process one operation whose value was sampled
+        :param op: READ or WRITE
+        :param value: value of the operation
+        :param sample: sample hash of the value (below threshold)
+        """
+        analyzer = self.analyzer
+        known = value in analyzer.last
+        # one sampled operation stands for this many operations of the whole trace
+        scale = self.groups * SAMPLE_RANGE / self.threshold
+
+        self.accesses += scale
+        size = analyzer.access(op, value)
+
+        if size is not None:
+            size = math.ceil(size * scale)
+            if size <= self.max_size:
+                self.hits[size] += scale
+
+        if self.max_keys is not None and not known and value in analyzer.last:
+            heapq.heappush(self.tracked, (-sample, value))
+            if len(analyzer.last) > self.max_keys:
+                self._shrink()
+
+    def _shrink(self):
+        """
+        Lower the threshold to the biggest sampled hash and forget all values at or above it
+        """
+        tracked = self.tracked
+        self.threshold = -tracked[0][0]
+
+        while tracked and -tracked[0][0] >= self.threshold:
+            self.analyzer.forget(heapq.heappop(tracked)[1])
+
+    def hit_ratios(self, total):
+        """
+        Estimated hit ratio for every size
+        :param total: real number of operations in the trace
+        :return: list of hit ratios for sizes 1 .. max_size
+        """
+        if not total:
+            return [0.0] * self.max_size
+
+        result = []
+        # SHARDS_adj: the sample over- or under-represents the trace mostly because of
+        # a few very popular values; the difference is put to the smallest size, where they HIT
+        hits = total - self.accesses
+
+        for size in range(1, self.max_size + 1):
+            hits += self.hits[size]
+            result.append(min(1.0, max(0.0, hits / total)))
+
+        return result
+
+
+def approximate_mrc(ops, max_size, rate=0.01, max_keys=None, groups=8):
+    """
+    Estimate hit ratios of every cache size 1 .. max_size from a hash sample of the values (SHARDS)
+    :param ops: iterable of (op, value) tuples
+    :param max_size: biggest cache size to report
+    :param rate: fraction of values sampled (initial fraction if max_keys is set)
+    :param max_keys: maximum number of sampled values, for constant memory (None for a fixed rate)
+    :param groups: number of independent groups the sample is split into (rounded up to a power of two)
+    :return: list of (size, estimated hit ratio, error bound) tuples; the bound is two standard errors
+    """
+    group_bits = (groups - 1).bit_length()
+    groups = 1 << group_bits
+    shift = 64 - SAMPLE_BITS
+    samples = [ShardsSample(max_size, rate, max_keys // groups if max_keys else None, groups)
+               for _ in range(groups)]
+    # cheap rejection of most operations against the highest threshold of all groups
+    limit = samples[0].threshold
+
+    total = 0
+
+    for op, value in ops:
+        total += 1
+        mixed = ((value if type(value) is int else _stable_hash(value)) * MIXER) & MASK64
+        sample = mixed >> shift
+        if sample < limit:
+            group = samples[mixed & (groups - 1)]
+            if sample < group.threshold:
+                group.access(op, value, sample)
+                if max_keys is not None and group.threshold < limit:
+                    limit = max(g.threshold for g in samples)
+
+    curves = [group.hit_ratios(total) for group in samples]
+    result = []
+
+    for i in range(max_size):
+        estimates = [curve[i] for curve in curves]
+        mean = sum(estimates) / groups
+        if groups > 1:
+            variance = sum((estimate - mean) ** 2 for estimate in estimates) / (groups - 1)
+            bound = 2 * math.sqrt(variance / groups)
+        else:
+            bound = float("nan")
+        result.append((i + 1, mean, bound))
+
+    return result
+
+
+def miss_ratio_curve(ops, max_size):
+    """
+    Compute HITS and MISSES of every cache size 1 .. max_size in one pass
+    :param ops: iterable of (op, value) tuples
+    :param max_size: biggest cache size to report
+    :return: list of (size, hits, misses) tuples
+    """
+    return StackDistanceAnalyzer(max_size).process(ops).curve()
+
+
+def validate_approximate(n_ops=1_000_000, n_keys=200_000, sizes=(100, 1_000, 5_000, 20_000)):
+    """
+    Compare approximate curves with exact replays of Cache on the synthetic traces
+    :param n_ops: number of operations of every trace
+    :param n_keys: number of distinct values of every trace
+    :param sizes: cache sizes replayed exactly
+    """
+    import time
+    from proj import Cache
+    from traces import scan_keys, zipf_ops
+
+    workloads = (
+        ("Zipf 0.9, 30% WRITE", zipf_ops(n_ops, n_keys, alpha=0.9)),
+        ("Zipf 0.8 + scans, WRITE only", [(WRITE, key) for key in scan_keys(n_ops, n_keys, alpha=0.8)]),
+    )
+    modes = (("rate 1%", dict(rate=0.01)), ("rate 10%", dict(rate=0.1)), ("8192 keys", dict(rate=1.0, max_keys=8192)))
+
+    for workload, ops in workloads:
+        print(f"{workload}, {n_ops} ops, {n_keys} values:")
+
+        start = time.perf_counter()
+        exact = []
+        for size in sizes:
+            hits, _ = Cache(size).replay(ops)
+            exact.append(hits / n_ops)
+        print(f"    {'exact replay':<12} {time.perf_counter() - start:6.1f} s  "
+              + "  ".join(f"{size}: {ratio:.4f}" for size, ratio in zip(sizes, exact)))
+
+        for name, options in modes:
+            start = time.perf_counter()
+            curve = approximate_mrc(ops, max(sizes), **options)
+            elapsed = time.perf_counter() - start
+            columns = "  ".join(f"{size}: {curve[size - 1][1]:.4f}+-{curve[size - 1][2]:.4f}" for size in sizes)
+            error = max(abs(curve[size - 1][1] - ratio) for size, ratio in zip(sizes, exact))
+            print(f"    {name:<12} {elapsed:6.1f} s  {columns}  max error {error:.4f}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["--validate"]:
+        validate_approximate()
+        sys.exit(0)
+
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python mrc.py <trace file> <max cache size> [sample rate]")
+        print("       python mrc.py --validate")
+        sys.exit(1)
+
+    with open(sys.argv[1]) as trace:
+        if len(sys.argv) == 4:
+            curve = approximate_mrc(read_commands(trace), int(sys.argv[2]), rate=float(sys.argv[3]))
+        else:
+            curve = [(size, hits / (hits + misses) if hits + misses else 0.0, 0.0)
+                     for size, hits, misses in miss_ratio_curve(read_commands(trace), int(sys.argv[2]))]
+
+    print("SIZE\tMISS RATIO\tERROR")
+    for size, hit_ratio, error in curve:
+        print(f"{size}\t{1 - hit_ratio:.4f}\t{error:.4f}")
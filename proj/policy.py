@@ -0,0 +1,225 @@
+'''@package docstring
+Eviction policy interface and registry of cache engines shared by the CLI, the GUIs and the benchmarks
+'''
+
+'''
+There are two ways to add a replacement algorithm:
+- write a Policy (on_hit, on_insert, choose_victim) and let PolicyCache do the
+  bookkeeping of HITs, MISSes and capacity - simplest, used by LRUPolicy and FIFOPolicy,
+- write a complete engine class with the Cache interface (read, write, hits,
+  misses, get_elements) - fastest, used by Cache, ArrayCache, ClockCache, ...
+Both are registered under a name with register_policy() and built with make_cache().
+'''
+
+from proj import Cache
+
+
+class Policy:
+    """ Interface of an eviction policy used by PolicyCache """
+
+    def on_hit(self, value):
+        """
+        Called when a cached value is read or written
+        :param value: referenced value
+        """
+        raise NotImplementedError
+
+    def on_insert(self, value):
+        """
+        Called when a new value is put into the cache
+        :param value: inserted value
+        """
+        raise NotImplementedError
+
+    def choose_victim(self):
+        """
+        Called when the cache is full; the policy must forget the returned value
+        :return: value to evict
+        """
+        raise NotImplementedError
+
+    def order(self):
+        """
+        Values in the order the policy would evict them (used for display)
+        :return: list of values
+        """
+        raise NotImplementedError
+
+
+class LRUPolicy(Policy):
+    """ Least recently used: recency kept in a Cache.Queue, same as Cache """
+
+    def __init__(self):
+        """ Initialize empty policy """
+        self.queue = Cache.Queue()
+        self.nodes = dict()
+
+    def on_hit(self, value):
+        self.queue.pop(self.nodes[value])
+        self.nodes[value] = self.queue.append(value)
+
+    def on_insert(self, value):
+        self.nodes[value] = self.queue.append(value)
+
+    def choose_victim(self):
+        victim = self.queue.pop_head()
+        del self.nodes[victim]
+        return victim
+
+    def order(self):
+        return self.queue.to_list()
+
+
+class FIFOPolicy(LRUPolicy):
+    """ First in, first out: like LRU but a HIT does not refresh the value """
+
+    def on_hit(self, value):
+        pass
+
+
+class PolicyCache:
+    """ Cache with the Cache interface whose replacement decisions are delegated to a Policy """
+
+    def __init__(self, size, policy=None):
+        """
+        Initialize cache
+        :param size: maximum size of the cache
+        :param policy: Policy instance (LRUPolicy if None)
+        """
+        self.size = size
+        self.policy = policy if policy is not None else LRUPolicy()
+        self.cache = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+        if value in self.cache:
+            self.hits += 1
+            self.policy.on_hit(value)
+            return True
+
+        self.misses += 1
+
+        if len(self.cache) >= self.size:
+            self.cache.remove(self.policy.choose_victim())
+            self.evictions += 1
+
+        self.cache.add(value)
+        self.policy.on_insert(value)
+        return False
+
+    def read(self, value):
+        """
+        Read value from the cache
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+        if value in self.cache:
+            self.hits += 1
+            self.policy.on_hit(value)
+            return True
+
+        self.misses += 1
+        return False
+
+    def resize(self, new_size):
+        """
+        Change size of the cache keeping its content; shrinking evicts the policy's victims
+        :param new_size: new maximum size of the cache
+        :return: list of evicted values
+        """
+        if new_size < 1:
+            raise ValueError(f"Cache size must be >= 1, got {new_size}")
+
+        self.size = new_size
+
+        evicted = []
+        while len(self.cache) > self.size:
+            victim = self.policy.choose_victim()
+            self.cache.remove(victim)
+            evicted.append(victim)
+            self.evictions += 1
+
+        return evicted
+
+    def get_elements(self):
+        """
+        Return cached values in eviction order
+        :return: list of values
+        """
+        return self.policy.order()
+
+
+''' registered engines: name -> function building a cache of given size '''
+POLICIES = dict()
+
+DEFAULT_POLICY = "lru"
+
+
+def register_policy(name, factory):
+    """
+    Register a cache engine or a Policy under a name
+    :param name: name used by make_cache, the CLI and the GUIs
+    :param factory: engine class / function taking size, or a Policy subclass (wrapped in PolicyCache)
+    """
+    if isinstance(factory, type) and issubclass(factory, Policy):
+        policy_class = factory
+        factory = lambda size: PolicyCache(size, policy_class())
+
+    POLICIES[name] = factory
+
+
+def make_cache(name, size):
+    """
+    Build a cache using a registered policy
+    :param name: registered name
+    :param size: size of the cache
+    :return: cache with the read/write/hits/misses/get_elements interface
+    """
+    if name not in POLICIES:
+        raise ValueError(f"Unknown policy {name!r}, choose from {', '.join(sorted(POLICIES))}")
+    return POLICIES[name](size)
+
+
+def resize_cache(cache, name, size):
+    """
+    Resize a cache in place if its engine supports it, otherwise replace it with a new (empty) one
+    :param cache: cache to resize
+    :param name: registered name of its policy
+    :param size: new size
+    :return: the resized cache or the new one
+    """
+    if hasattr(cache, "resize"):
+        cache.resize(size)
+        return cache
+    return make_cache(name, size)
+
+
+def _register_builtin():
+    """
+    Register the engines shipped with the project
+    """
+    from array_cache import ArrayCache
+    from arc import ARCCache
+    from clock_cache import ClockCache
+    from lazy_cache import LazyCache
+    from lfu import LFUCache
+    from tinylfu import TinyLFUCache
+
+    register_policy("lru", Cache)
+    register_policy("fifo", FIFOPolicy)
+    register_policy("array", ArrayCache)
+    register_policy("clock", ClockCache)
+    register_policy("lazy", LazyCache)
+    register_policy("arc", ARCCache)
+    register_policy("lfu", LFUCache)
+    register_policy("tinylfu", TinyLFUCache)
+
+
+_register_builtin()
@@ -9,8 +9,211 @@ write:
 
 '''
 
+import gc
+import os
+import struct
+import sys
+import time
+from array import array
+
+from traces import READ
+
+'''
+snapshot file: header, then blocks of at most SNAPSHOT_CHUNK keys from LRU to MRU,
+each followed by a block of their payloads (if flag set)
+header: magic, version, flags, size, number of entries, hits, misses
+block: kind, number of items, length of data, data
+    q  int64 little endian (keys or payloads that are all small ints)
+    s  UTF-8 strings joined by NUL (all strings, none containing NUL)
+    o  tagged items: N None, T/F bool, q int64, i big int (decimal), d float,
+       s str, b bytes (uint32 length + data), t tuple (uint32 length + items)
+Nothing is unpickled, so a damaged or foreign file can only fail with ValueError.
+Blocks are read one at a time, blocks cut off by a smaller size are not decoded.
+'''
+SNAPSHOT_MAGIC = b"LRUS"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sHHQQQQ")
+SNAPSHOT_PAYLOADS = 1
+SNAPSHOT_BLOCK = struct.Struct("<cIQ")
+SNAPSHOT_CHUNK = 1 << 16
+
+ITEM_INT = struct.Struct("<q")
+ITEM_FLOAT = struct.Struct("<d")
+ITEM_LENGTH = struct.Struct("<I")
+
+
+def _encode_item(item, out):
+    """
+    Append one tagged item of an "o" block
+    :param item: None, bool, int, float, str, bytes or tuple of them
+    :param out: bytearray to append to
+    """
+    kind = type(item)
+
+    if item is None:
+        out += b"N"
+    elif kind is bool:
+        out += b"T" if item else b"F"
+    elif kind is int:
+        if -(1 << 63) <= item < 1 << 63:
+            out += b"q" + ITEM_INT.pack(item)
+        else:
+            data = str(item).encode()
+            out += b"i" + ITEM_LENGTH.pack(len(data)) + data
+    elif kind is float:
+        out += b"d" + ITEM_FLOAT.pack(item)
+    elif kind is str or kind is bytes:
+        data = item.encode("utf-8", "surrogatepass") if kind is str else item
+        out += (b"s" if kind is str else b"b") + ITEM_LENGTH.pack(len(data)) + data
+    elif kind is tuple:
+        out += b"t" + ITEM_LENGTH.pack(len(item))
+        for part in item:
+            _encode_item(part, out)
+    else:
+        raise TypeError(f"{kind.__name__} cannot be saved in a cache snapshot")
+
+
+def _decode_item(data, offset):
+    """
+    Read one tagged item of an "o" block
+    :param data: data of the block
+    :param offset: position of the tag
+    :return: item, position after it
+    """
+    tag = data[offset:offset + 1]
+    offset += 1
+
+    if tag == b"N":
+        return None, offset
+    if tag == b"T" or tag == b"F":
+        return tag == b"T", offset
+    if tag == b"q":
+        return ITEM_INT.unpack_from(data, offset)[0], offset + ITEM_INT.size
+    if tag == b"d":
+        return ITEM_FLOAT.unpack_from(data, offset)[0], offset + ITEM_FLOAT.size
+
+    length, = ITEM_LENGTH.unpack_from(data, offset)
+    offset += ITEM_LENGTH.size
+
+    if tag == b"t":
+        items = []
+        for _ in range(length):
+            item, offset = _decode_item(data, offset)
+            items.append(item)
+        return tuple(items), offset
+
+    end = offset + length
+    if end > len(data):
+        raise ValueError("truncated snapshot item")
+    if tag == b"s":
+        return data[offset:end].decode("utf-8", "surrogatepass"), end
+    if tag == b"b":
+        return data[offset:end], end
+    if tag == b"i":
+        return int(data[offset:end]), end
+    raise ValueError(f"unknown snapshot item {tag!r}")
+
+
+def _write_block(file, items):
+    """
+    Write a list of keys or payloads as one block, in the most compact kind that holds all of them
+    :param file: snapshot file
+    :param items: keys or payloads
+    """
+    data = None
+
+    if all(type(item) is int for item in items):
+        try:
+            numbers = array("q", items)
+        except OverflowError:
+            pass
+        else:
+            if sys.byteorder != "little":
+                numbers.byteswap()
+            kind, data = b"q", numbers.tobytes()
+    elif all(type(item) is str for item in items):
+        text = "\0".join(items)
+        if text.count("\0") == len(items) - 1:
+            kind, data = b"s", text.encode("utf-8", "surrogatepass")
+
+    if data is None:
+        out = bytearray()
+        for item in items:
+            _encode_item(item, out)
+        kind, data = b"o", out
+
+    file.write(SNAPSHOT_BLOCK.pack(kind, len(items), len(data)))
+    file.write(data)
+
+
+def _read_block(file):
+    """
+    Read one block without decoding it
+    :param file: snapshot file
+    :return: kind, number of items, data
+    """
+    header = file.read(SNAPSHOT_BLOCK.size)
+    if len(header) != SNAPSHOT_BLOCK.size:
+        raise ValueError("truncated snapshot")
+
+    kind, count, length = SNAPSHOT_BLOCK.unpack(header)
+    if length > os.fstat(file.fileno()).st_size - file.tell():
+        raise ValueError("truncated snapshot")
+    data = file.read(length)
+    if len(data) != length:
+        raise ValueError("truncated snapshot")
+
+    return kind, count, data
+
+
+def _decode_block(kind, count, data):
+    """
+    Decode the items of a block
+    :param kind: kind of the block
+    :param count: number of items
+    :param data: data of the block
+    :return: list of items
+    """
+    try:
+        if kind == b"q":
+            numbers = array("q")
+            numbers.frombytes(data)
+            if sys.byteorder != "little":
+                numbers.byteswap()
+            items = numbers.tolist()
+        elif kind == b"s":
+            items = data.decode("utf-8", "surrogatepass").split("\0") if count else []
+        elif kind == b"o":
+            items = []
+            offset = 0
+            for _ in range(count):
+                item, offset = _decode_item(data, offset)
+                items.append(item)
+        else:
+            raise ValueError(f"unknown snapshot block {kind!r}")
+    except (struct.error, UnicodeDecodeError) as error:
+        raise ValueError(f"damaged snapshot block: {error}") from None
+
+    if len(items) != count:
+        raise ValueError("damaged snapshot block")
+
+    return items
+
+
 class Cache:
     """ Class implementing a simple LRU cache """
+
+    '''
+    True while evict() only unlinks the LRU node, so resize() may cut many values off the queue at once.
+    Subclasses overriding evict get False automatically; code wrapping evict of an instance sets it on the instance.
+    '''
+    batch_evict = True
+
+    def __init_subclass__(cls, **kwargs):
+        """ A subclass with its own evict must see every evicted value, unless it sets batch_evict itself """
+        super().__init_subclass__(**kwargs)
+        if "evict" in vars(cls) and "batch_evict" not in vars(cls):
+            cls.batch_evict = False
     
     class Node:
         """ Node for doubly linked list """
@@ -97,6 +300,21 @@ class Cache:
 
             return node.value
 
+        def to_list(self):
+            """
+            Return values of the queue from head to tail
+            :return: list of values
+            """
+
+            elements = []
+            current = self.head
+
+            while current:
+                elements.append(current.value)
+                current = current.next
+
+            return elements
+
     def __init__(self, size):
         """
         Initialize cache with given size; uses a dictionary for fast lookups and a doubly linked list for LRU tracking.
@@ -134,8 +352,7 @@ class Cache:
 
         if len(self.cache) >= self.size:
             # cache is full, need to remove oldest
-            oldest = self.queue.pop_head()
-            self.cache.pop(oldest)
+            self.evict()
 
         # putting new value to the newest position of queue
         new_node = self.queue.append(value)
@@ -144,6 +361,73 @@ class Cache:
 
         return False  # MISS
 
+    def evict(self):
+        """
+        Remove the least recently used value from the cache
+        :return: removed value
+        """
+
+        oldest = self.queue.pop_head()
+        self.cache.pop(oldest)
+
+        return oldest
+
+    def discard(self, value):
+        """
+        Remove a value from any position of the queue (expiry, invalidation); not counted as an eviction
+        :param value: value to remove, a value that is not cached is ignored
+        :return: True if the value was cached
+        """
+
+        node = self.cache.pop(value, None)
+        if node is None:
+            return False
+
+        self.queue.pop(node)
+        return True
+
+    def resize(self, new_size):
+        """
+        Change size of the cache keeping its content; growing is O(1),
+        shrinking evicts only the values that do not fit, from the LRU end
+        :param new_size: new maximum size of the cache
+        :return: list of evicted values from LRU to MRU
+        """
+
+        if new_size < 1:
+            raise ValueError(f"Cache size must be >= 1, got {new_size}")
+
+        excess = len(self.cache) - new_size
+        self.size = new_size
+
+        if excess <= 0:
+            return []
+
+        if not self.batch_evict:
+            # evict is extended (write-back, weights, metrics, ...), let it see every value
+            return [self.evict() for _ in range(excess)]
+
+        # cut the whole excess off the head of the queue with one relink
+        evicted = []
+        node = self.queue.head
+        for _ in range(excess):
+            evicted.append(node.value)
+            node = node.next
+
+        if node is None:
+            self.queue.head = None
+            self.queue.tail = None
+        else:
+            node.prev.next = None
+            node.prev = None
+            self.queue.head = node
+
+        cache = self.cache
+        for value in evicted:
+            del cache[value]
+
+        return evicted
+
     def read(self, value):
         """
         Read value from the cache
@@ -170,28 +454,314 @@ class Cache:
 
         return False
 
+    def contains(self, value):
+        """
+        Check if value is cached without promoting it and without counting a HIT or MISS
+        :param value: value to look up
+        :return: True if cached
+        """
+        return value in self.cache
+
+    def read_many(self, values):
+        """
+        Read a batch of values from the cache
+        :param values: iterable of values to read
+        :return: bytearray bitmap, bit i (byte i // 8, bit i % 8) is set if values[i] was a HIT
+        """
+        return self._many(self.read, values)
+
+    def write_many(self, values):
+        """
+        Write a batch of values to the cache
+        :param values: iterable of values to write
+        :return: bytearray bitmap, bit i (byte i // 8, bit i % 8) is set if values[i] was a HIT
+        """
+        return self._many(self.write, values)
+
+    def _many(self, operation, values):
+        """
+        Apply operation to every value and pack the results into a bitmap
+        :param operation: bound read or write method
+        :param values: iterable of values
+        :return: bytearray bitmap of HITs
+        """
+
+        bitmap = bytearray()
+        byte = 0
+        bit = 1
+
+        for value in values:
+            if operation(value):
+                byte |= bit
+            bit <<= 1
+            if bit == 256:
+                bitmap.append(byte)
+                byte = 0
+                bit = 1
+
+        if bit != 1:
+            bitmap.append(byte)
+
+        return bitmap
+
+    def replay(self, ops):
+        """
+        Replay a stream of operations without printing anything;
+        ops are consumed one by one, so a generator over a file keeps memory constant
+        :param ops: iterable of (op, value) tuples, op is traces.READ or traces.WRITE
+        :return: (hits, misses) of the replayed operations
+        """
+
+        read = self.read
+        write = self.write
+        hits = self.hits
+        misses = self.misses
+
+        for op, value in ops:
+            if op == READ:
+                read(value)
+            else:
+                write(value)
+
+        return self.hits - hits, self.misses - misses
+
+    def get_elements(self):
+        """
+        Return cached values
+        :return: list of values from LRU to MRU
+        """
+        return self.queue.to_list()
+
+    def snapshot(self, path):
+        """
+        Save LRU order, payloads (if the cache stores any) and counters to a file
+        :param path: path of the snapshot file
+        """
+
+        keys = self.queue.to_list()
+        payloads = self._payloads(keys)
+        flags = SNAPSHOT_PAYLOADS if payloads is not None else 0
+
+        with open(path, "wb") as snapshot:
+            snapshot.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags,
+                                                self.size, len(keys), self.hits, self.misses))
+            for start in range(0, len(keys), SNAPSHOT_CHUNK):
+                _write_block(snapshot, keys[start:start + SNAPSHOT_CHUNK])
+                if payloads is not None:
+                    _write_block(snapshot, payloads[start:start + SNAPSHOT_CHUNK])
+
+    @classmethod
+    def load(cls, path, size=None, **kwargs):
+        """
+        Build a warm cache from a snapshot file, read block by block
+        :param path: path of the snapshot file
+        :param size: size of the new cache (the saved size if None); a smaller size keeps the most recent values
+        :param kwargs: other arguments of the constructor (sink, default_ttl, weigher, ...)
+        :return: new cache
+        """
+
+        with open(path, "rb") as snapshot:
+            header = snapshot.read(SNAPSHOT_HEADER.size)
+            if len(header) != SNAPSHOT_HEADER.size:
+                raise ValueError(f"{path} is not a cache snapshot")
+
+            magic, version, flags, saved_size, count, hits, misses = SNAPSHOT_HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is not a cache snapshot")
+
+            cache = cls(saved_size if size is None else size, **kwargs)
+            skip = max(0, count - cache.size)     # the LRU end that does not fit
+            keys = []
+            payloads = [] if flags & SNAPSHOT_PAYLOADS else None
+            done = 0
+
+            while done < count:
+                blocks = [_read_block(snapshot)]
+                if payloads is not None:
+                    blocks.append(_read_block(snapshot))
+                block_count = blocks[0][1]
+                if block_count == 0 or any(block[1] != block_count for block in blocks):
+                    raise ValueError(f"{path} is a damaged cache snapshot")
+
+                if done + block_count > skip:
+                    first = max(0, skip - done)
+                    keys.extend(_decode_block(*blocks[0])[first:])
+                    if payloads is not None:
+                        payloads.extend(_decode_block(*blocks[1])[first:])
+                done += block_count
+
+        # millions of new nodes would trigger the cyclic garbage collector over and over, pause it
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            cache._restore(keys, payloads)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        cache.hits = hits
+        cache.misses = misses
+
+        return cache
+
+    def _payloads(self, keys):
+        """
+        Payloads saved with the snapshot; Cache stores none
+        :param keys: cached values from LRU to MRU
+        :return: list of payloads in the order of keys, or None
+        """
+        return None
+
+    def _restore(self, keys, payloads):
+        """
+        Fill an empty cache with values from LRU to MRU, linking the nodes directly
+        :param keys: values from LRU to MRU, at most size of them
+        :param payloads: payloads in the order of keys, or None
+        """
+
+        Node = self.Node
+        cache = self.cache
+        prev = None
+
+        for key in keys:
+            node = Node(key)
+            if prev is None:
+                self.queue.head = node
+            else:
+                prev.next = node
+                node.prev = prev
+            cache[key] = node
+            prev = node
+
+        self.queue.tail = prev
+
+    def reset(self):
+        """
+        Remove all values and reset counters
+        """
+        self.cache = dict()
+        self.queue = self.Queue()
+        self.hits = 0
+        self.misses = 0
+
     def display(self):
         """
         Display the cache
         """
+        display(self)
+
+
+def describe(cache):
+    """
+    Describe any cache engine (see policy.py) in the CLI format
+    :param cache: cache with get_elements, hits and misses
+    :return: two lines of text: content of the cache and counters
+    """
+
+    elements = [str(value) for value in cache.get_elements()]
+
+    return (f"Cache [LRU -> MRU]: {' -> '.join(elements) if elements else 'EMPTY'}\n"
+            f"HITS: {cache.hits}, MISSES: {cache.misses}")
+
+
+def display(cache):
+    """
+    Display any cache engine (see policy.py) in the CLI format
+    :param cache: cache with get_elements, hits and misses
+    """
+    print(describe(cache))
 
-        elements = []
-        current = self.queue.head
 
-        while current:
-            elements.append(current.value)
-            current = current.next
+def _until_exit(lines):
+    """
+    Pass lines on up to an EXIT command, which ends a batch like it ends the interactive mode
+    :param lines: iterable of text commands
+    :return: generator of the lines before EXIT
+    """
+    for line in lines:
+        # cheap test first, only lines starting with E can be EXIT
+        if line.lstrip()[:1] in ("E", "e"):
+            command = line.split()
+            if command[0].upper() in ("EXIT", "E"):
+                return
+        yield line
 
-        print("Cache [LRU -> MRU]:", " -> ".join(elements) if elements else "EMPTY")
-        print(f"HITS: {self.hits}, MISSES: {self.misses}")
+
+def run_batch(cache, lines, out, dump_every=None, quiet=False):
+    """
+    Replay text commands without per-op display; results go to out one per line
+    :param cache: cache to drive
+    :param lines: iterable of text commands (e.g. an open file or sys.stdin), invalid lines are skipped, EXIT stops
+    :param out: text stream for the results (should be buffered)
+    :param dump_every: write the whole cache state every this many operations (None for never)
+    :param quiet: do not write HIT/MISS lines
+    :return: (number of operations, seconds)
+    """
+    from traces import read_commands
+
+    read = cache.read
+    write = cache.write
+    emit = out.write
+    n = 0
+    start = time.perf_counter()
+
+    for op, value in read_commands(_until_exit(lines)):
+        hit = read(value) if op == READ else write(value)
+        n += 1
+        if not quiet:
+            emit("HIT\n" if hit else "MISS\n")
+        if dump_every and n % dump_every == 0:
+            emit(f"--- after {n} ops\n{describe(cache)}\n")
+
+    return n, time.perf_counter() - start
 
 
 
 
 if __name__ == "__main__":
+    import argparse
+    import sys
+    from policy import DEFAULT_POLICY, POLICIES, make_cache
+
+    parser = argparse.ArgumentParser(description="LRU cache simulator, interactive unless --batch is given.")
+    parser.add_argument("policy", nargs="?", default=DEFAULT_POLICY, help=f"eviction policy: {', '.join(sorted(POLICIES))}")
+    parser.add_argument("--batch", metavar="TRACE", help="replay commands from a file ('-' for stdin) without display")
+    parser.add_argument("--size", type=int, help="size of the cache (asked for if not given)")
+    parser.add_argument("--dump-every", type=int, metavar="N", help="batch mode: write the cache state every N ops")
+    parser.add_argument("--quiet", action="store_true", help="batch mode: print only the final statistics")
+    args = parser.parse_args()
+
+    policy = args.policy
+    if policy not in POLICIES:
+        print(f"Unknown policy {policy}, choose from: {', '.join(sorted(POLICIES))}")
+        sys.exit(1)
+
+    if args.batch is not None:
+        if args.size is None or args.size <= 0:
+            print("Batch mode needs --size with a positive integer.")
+            sys.exit(1)
+
+        try:
+            trace = sys.stdin if args.batch == "-" else open(args.batch)
+        except OSError as error:
+            print(f"Cannot open trace {args.batch}: {error.strerror}")
+            sys.exit(1)
+
+        cache = make_cache(policy, args.size)
+        # one large buffer instead of a flush per line
+        out = open(sys.stdout.fileno(), "w", buffering=1 << 20, closefd=False)
+
+        with trace, out:
+            n, elapsed = run_batch(cache, trace, out, args.dump_every, args.quiet)
+            total = cache.hits + cache.misses
+            out.write(f"Policy {policy}, size {args.size}: {n} ops in {elapsed:.3f} s "
+                      f"({n / elapsed if elapsed else 0:,.0f} ops/s)\n")
+            out.write(f"HITS: {cache.hits}, MISSES: {cache.misses}, "
+                      f"hit ratio {cache.hits / total if total else 0:.4f}\n")
+        sys.exit(0)
 
     # Reading cache size from user
-    size = 0
+    size = args.size or 0
     while size <= 0:
         try:
             size = int(input("Enter size of the cache (positive integer): "))
@@ -200,8 +770,8 @@ if __name__ == "__main__":
         except ValueError:
             print("Invalid input. Please enter a positive integer.")
             size = 0
-    cache = Cache(size)
-    print(f"Cache size set to {size}.")
+    cache = make_cache(policy, size)
+    print(f"Cache size set to {size}, policy {policy}.")
     
     # Reading operations from user
     print("Enter commands: (READ <value> or WRITE <value> or EXIT):")
@@ -221,12 +791,12 @@ if __name__ == "__main__":
         if (command[0].upper() == "READ" or command[0].upper() == "R") and len(command) == 2:
             hit = cache.read(command[1])
             print("HIT" if hit else "MISS")
-            cache.display()
+            display(cache)
 
         elif (command[0].upper() == "WRITE" or command[0].upper() == "W") and len(command) == 2:
             hit = cache.write(command[1])
             print("HIT" if hit else "MISS")
-            cache.display()
+            display(cache)
 
         else:
             print("Invalid command.")
@@ -0,0 +1,151 @@
+'''@package docstring
+Thread safe LRU cache split into independently locked shards
+'''
+
+import threading
+
+from proj import Cache
+
+
+class ShardedCache:
+    """ LRU cache made of N Cache shards; a value always goes to the same shard and each shard has its own lock """
+
+    def __init__(self, size, shards=16):
+        """
+        Initialize cache; the total size is divided between the shards as evenly as possible.
+        :param size: maximum size of the whole cache
+        :param shards: number of shards (at most size, so that every shard can hold a value)
+        """
+        shards = max(1, min(shards, size))
+
+        self.size = size
+        self.shards = [Cache(size // shards + (1 if i < size % shards else 0)) for i in range(shards)]
+        self.locks = [threading.Lock() for _ in range(shards)]
+
+    def _shard(self, value):
+        """
+        Find index of the shard responsible for value
+        :param value: value to look up
+        :return: index of the shard
+        """
+        return hash(value) % len(self.shards)
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+        i = self._shard(value)
+        with self.locks[i]:
+            return self.shards[i].write(value)
+
+    def read(self, value):
+        """
+        Read value from the cache
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+        i = self._shard(value)
+        with self.locks[i]:
+            return self.shards[i].read(value)
+
+    @property
+    def hits(self):
+        """ Number of HITs of all shards """
+        return sum(shard.hits for shard in self.shards)
+
+    @property
+    def misses(self):
+        """ Number of MISSes of all shards """
+        return sum(shard.misses for shard in self.shards)
+
+    def __len__(self):
+        """
+        :return: number of values in the cache
+        """
+        return sum(len(shard.cache) for shard in self.shards)
+
+
+def stress_test(cache, threads=8, ops_per_thread=50_000, n_keys=2_000):
+    """
+    Hammer the cache from many threads and check that no operation was lost and no shard overflowed
+    :param cache: ShardedCache to test
+    :param threads: number of threads
+    :param ops_per_thread: operations done by every thread
+    :param n_keys: number of distinct values
+    """
+    import random
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(ops_per_thread):
+            value = rng.randrange(n_keys)
+            if rng.random() < 0.5:
+                cache.read(value)
+            else:
+                cache.write(value)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert cache.hits + cache.misses == threads * ops_per_thread, "lost HIT/MISS updates"
+    assert len(cache) <= cache.size, "cache holds more values than its size"
+
+    for shard in cache.shards:
+        elements = []
+        node = shard.queue.head
+        while node:
+            elements.append(node.value)
+            node = node.next
+        assert len(shard.cache) <= shard.size, "shard holds more values than its size"
+        assert sorted(elements) == sorted(shard.cache), "shard queue does not match its dictionary"
+
+
+def benchmark(size=10_000, ops_per_thread=200_000, n_keys=100_000):
+    """
+    Measure total throughput for a growing number of threads, compared with one global lock
+    :param size: size of the cache
+    :param ops_per_thread: operations done by every thread
+    :param n_keys: number of distinct values
+    """
+    import time
+    from traces import zipf_keys
+
+    class GlobalLockCache:
+        """ Baseline: a single Cache behind one lock """
+        def __init__(self, size):
+            self.cache = Cache(size)
+            self.lock = threading.Lock()
+
+        def write(self, value):
+            with self.lock:
+                return self.cache.write(value)
+
+    keys = zipf_keys(ops_per_thread, n_keys, alpha=0.9)
+
+    def worker(cache):
+        write = cache.write
+        for value in keys:
+            write(value)
+
+    print(f"Writes of Zipf 0.9 keys, {ops_per_thread} per thread, cache size {size}:")
+    for threads in (1, 2, 4, 8):
+        for name, cache in (("global lock", GlobalLockCache(size)), ("sharded", ShardedCache(size))):
+            workers = [threading.Thread(target=worker, args=(cache,)) for _ in range(threads)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            print(f"    {threads} threads  {name:<12} {threads * ops_per_thread / elapsed:12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    stress_test(ShardedCache(1_000, shards=8))
+    print("Stress test passed.")
+    benchmark()
@@ -0,0 +1,308 @@
+'''@package docstring
+LRU cache of integer keys living in a multiprocessing.shared_memory segment, shared by worker processes
+'''
+
+'''
+The segment is split into shards (a key always goes to shard key % shards),
+each with its own multiprocessing.Lock, so workers touching different shards
+do not wait for each other. A shard is a block of 64 bit words:
+
+    header   hits, misses, used slots, head (LRU) slot, tail (MRU) slot
+    keys     key stored in every slot
+    prev     LRU list links between slots (NIL = -1)
+    next
+    chain    next slot in the same hash bucket
+    buckets  first slot of every hash bucket (power of two >= 2 * capacity)
+
+Only integers fit in the segment, so keys are ints in the signed 64 bit range.
+The cache is passed to worker processes as an argument (Process or Pool
+initializer); the child attaches to the same segment and the same locks.
+'''
+
+from array import array
+from multiprocessing import Lock
+from multiprocessing.shared_memory import SharedMemory
+
+NIL = -1
+HITS, MISSES, USED, HEAD, TAIL = range(5)
+HEADER_WORDS = 5
+
+
+class SharedCache:
+    """ LRU cache with the same read/write/hits/misses interface as Cache, stored in shared memory """
+
+    def __init__(self, size, shards=8, _attach=None):
+        """
+        Create a new shared segment; the creating process owns it and should unlink() it at the end.
+        :param size: maximum size of the whole cache
+        :param shards: number of independently locked shards (at most size)
+        """
+        shards = max(1, min(shards, size))
+
+        self.size = size
+        self.capacities = [size // shards + (1 if i < size % shards else 0) for i in range(shards)]
+        capacity = self.capacities[0]
+        self.bits = max(1, (2 * capacity - 1).bit_length())
+        self.shard_words = HEADER_WORDS + 4 * capacity + (1 << self.bits)
+
+        if _attach is None:
+            self.memory = SharedMemory(create=True, size=8 * self.shard_words * shards)
+            self.locks = [Lock() for _ in range(shards)]
+            self.owner = True
+        else:
+            name, self.locks = _attach
+            self.memory = SharedMemory(name=name)
+            self.owner = False
+
+        self._map()
+
+        if _attach is None:
+            for shard in self.views:
+                shard[0][HEAD] = NIL
+                shard[0][TAIL] = NIL
+                shard[5][:] = array("q", [NIL]) * len(shard[5])
+
+    def _map(self):
+        """
+        Build per-shard views (header, keys, prev, next, chain, buckets) over the segment
+        """
+        words = self.words = self.memory.buf.cast("q")
+        capacity = self.capacities[0]
+        self.views = []
+
+        for i in range(len(self.capacities)):
+            base = i * self.shard_words
+            header = words[base:base + HEADER_WORDS]
+            base += HEADER_WORDS
+            arrays = []
+            for _ in range(4):
+                arrays.append(words[base:base + capacity])
+                base += capacity
+            buckets = words[base:base + (1 << self.bits)]
+            self.views.append((header, *arrays, buckets))
+
+    def __getstate__(self):
+        """ Pickled state: only the name of the segment and the locks (inherited by the child process) """
+        return {"size": self.size, "shards": len(self.capacities), "name": self.memory.name, "locks": self.locks}
+
+    def __setstate__(self, state):
+        """ Attach to the segment of the parent process """
+        self.__init__(state["size"], state["shards"], _attach=(state["name"], state["locks"]))
+
+    def _bucket(self, key):
+        """
+        Compute hash bucket of a key inside its shard
+        :param key: integer key
+        :return: index into buckets
+        """
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - self.bits)
+
+    @staticmethod
+    def _unlink(header, prev, next, slot):
+        """
+        Remove slot from the LRU list of its shard
+        """
+        p = prev[slot]
+        n = next[slot]
+        if p == NIL:
+            header[HEAD] = n
+        else:
+            next[p] = n
+        if n == NIL:
+            header[TAIL] = p
+        else:
+            prev[n] = p
+
+    @staticmethod
+    def _link_tail(header, prev, next, slot):
+        """
+        Put slot at the MRU end of the LRU list of its shard
+        """
+        tail = header[TAIL]
+        prev[slot] = tail
+        next[slot] = NIL
+        if tail == NIL:
+            header[HEAD] = slot
+        else:
+            next[tail] = slot
+        header[TAIL] = slot
+
+    def _access(self, key, insert):
+        """
+        Look the key up in its shard, refreshing it on a HIT and inserting it on a MISS if asked to
+        :param key: integer key
+        :param insert: True for write, False for read
+        :return: True if HIT, False if MISS
+        """
+        i = key % len(self.capacities)
+        header, keys, prev, next, chain, buckets = self.views[i]
+        bucket = self._bucket(key)
+
+        with self.locks[i]:
+            slot = buckets[bucket]
+            while slot != NIL and keys[slot] != key:
+                slot = chain[slot]
+
+            if slot != NIL:
+                # HIT case - move the slot to the MRU end
+                header[HITS] += 1
+                if header[TAIL] != slot:
+                    self._unlink(header, prev, next, slot)
+                    self._link_tail(header, prev, next, slot)
+                return True
+
+            # MISS case
+            header[MISSES] += 1
+            if not insert:
+                return False
+
+            if header[USED] < self.capacities[i]:
+                slot = header[USED]
+                header[USED] += 1
+            else:
+                # shard is full, reuse the LRU slot after removing its key from the hash chain
+                slot = header[HEAD]
+                self._unlink(header, prev, next, slot)
+                old = self._bucket(keys[slot])
+                if buckets[old] == slot:
+                    buckets[old] = chain[slot]
+                else:
+                    before = buckets[old]
+                    while chain[before] != slot:
+                        before = chain[before]
+                    chain[before] = chain[slot]
+
+            keys[slot] = key
+            chain[slot] = buckets[bucket]
+            buckets[bucket] = slot
+            self._link_tail(header, prev, next, slot)
+
+            return False
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: integer value to write
+        :return: True if HIT, False if MISS
+        """
+        return self._access(value, True)
+
+    def read(self, value):
+        """
+        Read value from the cache
+        :param value: integer value to read
+        :return: True if HIT, False if MISS
+        """
+        return self._access(value, False)
+
+    @property
+    def hits(self):
+        """ Number of HITs of all processes """
+        return sum(shard[0][HITS] for shard in self.views)
+
+    @property
+    def misses(self):
+        """ Number of MISSes of all processes """
+        return sum(shard[0][MISSES] for shard in self.views)
+
+    def __len__(self):
+        """
+        :return: number of values in the cache
+        """
+        return sum(shard[0][USED] for shard in self.views)
+
+    def get_elements(self):
+        """
+        Return cached values shard by shard, each from LRU to MRU
+        :return: list of values
+        """
+        elements = []
+
+        for i, (header, keys, prev, next, chain, buckets) in enumerate(self.views):
+            with self.locks[i]:
+                slot = header[HEAD]
+                while slot != NIL:
+                    elements.append(keys[slot])
+                    slot = next[slot]
+
+        return elements
+
+    def close(self):
+        """
+        Detach this process from the segment
+        """
+        for view in self.views:
+            for array in view:
+                array.release()
+        self.views = []
+        self.words.release()
+        self.memory.close()
+
+    def unlink(self):
+        """
+        Close and destroy the segment; call once, in the owning process, after the workers are done
+        """
+        self.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def _worker(cache, keys, results):
+    """
+    Write all keys into the cache and report the time taken
+    :param cache: SharedCache or Cache
+    :param keys: keys to write
+    :param results: multiprocessing queue receiving (hits, misses, seconds)
+    """
+    import time
+
+    write = cache.write
+    start = time.perf_counter()
+    for key in keys:
+        write(key)
+    elapsed = time.perf_counter() - start
+
+    results.put((cache.hits, cache.misses, elapsed))
+    if isinstance(cache, SharedCache):
+        cache.close()
+
+
+def benchmark(size=10_000, ops_per_process=100_000, n_keys=100_000):
+    """
+    Compare workers with private caches of size / processes with workers sharing one cache of size
+    :param size: total cache memory in entries
+    :param ops_per_process: writes done by every worker
+    :param n_keys: number of distinct keys
+    """
+    from multiprocessing import Process, Queue
+    from proj import Cache
+    from traces import zipf_keys
+
+    print(f"Writes of Zipf 0.9 keys, {ops_per_process} per process, {size} entries in total:")
+
+    for processes in (1, 2, 4):
+        for name in ("private", "shared"):
+            shared = SharedCache(size) if name == "shared" else None
+            results = Queue()
+            workers = [Process(target=_worker,
+                               args=(shared if shared is not None else Cache(size // processes),
+                                     zipf_keys(ops_per_process, n_keys, alpha=0.9, seed=seed), results))
+                       for seed in range(processes)]
+            for worker in workers:
+                worker.start()
+            reports = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+
+            if shared is not None:
+                hits, misses = shared.hits, shared.misses
+                shared.unlink()
+            else:
+                hits, misses = sum(r[0] for r in reports), sum(r[1] for r in reports)
+
+            ops_per_second = processes * ops_per_process / max(r[2] for r in reports)
+            print(f"    {processes} processes  {name:<8} hit ratio {hits / (hits + misses):.4f}  {ops_per_second:12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    benchmark()
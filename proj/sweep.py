@@ -0,0 +1,107 @@
+'''@package docstring
+Parallel sweep of cache sizes and policies over one trace
+'''
+
+'''
+The trace is shared through the binary trace format: every worker process
+maps the same file with mmap, so the operating system keeps one copy of it
+in the page cache and nothing is pickled or copied between processes.
+Only (policy, size) goes to a worker and (hits, misses) comes back.
+'''
+
+import multiprocessing
+import os
+import tempfile
+import time
+
+from policy import POLICIES, make_cache
+from traces import READ, BinaryTrace, convert_text_trace
+
+''' trace mapped once in every worker process '''
+_trace = None
+
+
+def _open_trace(path):
+    """
+    Pool initializer: map the trace in the worker process
+    :param path: path of the binary trace
+    """
+    global _trace
+    _trace = BinaryTrace(path)
+
+
+def _simulate(config):
+    """
+    Replay the mapped trace on one cache configuration
+    :param config: (policy name, size) tuple
+    :return: (policy name, size, hits, misses)
+    """
+    policy, size = config
+    cache = make_cache(policy, size)
+    read = cache.read
+    write = cache.write
+
+    for op, key in _trace.ops():
+        if op == READ:
+            read(key)
+        else:
+            write(key)
+
+    return policy, size, cache.hits, cache.misses
+
+
+def sweep(path, sizes, policies=("lru",), processes=None):
+    """
+    Simulate every (policy, size) pair on the trace in a pool of processes
+    :param path: path of the binary trace
+    :param sizes: iterable of cache sizes
+    :param policies: iterable of registered policy names (see policy.py)
+    :param processes: number of worker processes (default: number of CPUs)
+    :return: list of (policy, size, hits, misses, hit ratio) sorted by policy and size
+    """
+    for policy in policies:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, choose from {', '.join(sorted(POLICIES))}")
+
+    configs = [(policy, size) for policy in policies for size in sizes]
+
+    with multiprocessing.Pool(processes, initializer=_open_trace, initargs=(path,)) as pool:
+        results = pool.map(_simulate, configs, chunksize=1)
+
+    table = []
+    for policy, size, hits, misses in sorted(results):
+        total = hits + misses
+        table.append((policy, size, hits, misses, hits / total if total else 0.0))
+
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay one trace against many cache configurations in parallel.")
+    parser.add_argument("trace", help="binary trace, or text trace with --text")
+    parser.add_argument("sizes", type=int, nargs="+", help="cache sizes to simulate")
+    parser.add_argument("--text", action="store_true", help="trace is a text command trace, convert it first")
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES), help="policy to simulate (repeatable)")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+
+    path = args.trace
+    if args.text:
+        fd, path = tempfile.mkstemp(suffix=".lrut")
+        os.close(fd)
+        convert_text_trace(args.trace, path)
+
+    try:
+        start = time.perf_counter()
+        table = sweep(path, args.sizes, args.policy or ["lru"], args.processes)
+        elapsed = time.perf_counter() - start
+    finally:
+        if args.text:
+            os.remove(path)
+
+    print("POLICY\tSIZE\tHITS\tMISSES\tHIT RATIO")
+    for policy, size, hits, misses, ratio in table:
+        print(f"{policy}\t{size}\t{hits}\t{misses}\t{ratio:.4f}")
+    print(f"{len(table)} configurations in {elapsed:.2f} s")
@@ -0,0 +1,251 @@
+'''@package docstring
+W-TinyLFU: LRU admission window + segmented LRU main cache, admission decided by a count-min sketch
+'''
+
+'''
+A new value always enters the small window LRU (1% of the size). The value
+pushed out of the window is a candidate for the main cache; if the main cache
+is full, the candidate replaces the main victim (LRU of the probation segment)
+only if the sketch estimates it was requested more often. One-hit wonders
+therefore die in the window instead of evicting hot values.
+
+The sketch has a fixed number of 8 bit counters (width * depth bytes) no matter
+how many distinct keys show up; counters saturate at 15 and are all halved
+after every sample_size recorded accesses, so old popularity fades.
+'''
+
+from proj import Cache
+
+WINDOW, PROBATION, PROTECTED = range(3)
+
+''' translation table halving every byte, used to age all counters at once '''
+HALF = bytes(i >> 1 for i in range(256))
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+class CountMinSketch:
+    """ Count-min sketch of access frequencies with 4 rows of small saturating counters and periodic aging """
+
+    MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MAX_COUNT = 15
+
+    def __init__(self, width, sample_size):
+        """
+        Initialize sketch
+        :param width: counters per row, rounded up to a power of two
+        :param sample_size: number of recorded accesses after which all counters are halved
+        """
+        width = 1 << max(4, (width - 1).bit_length())
+        self.width = width
+        self.mask = width - 1
+        self.table = bytearray(width * len(self.MULTIPLIERS))
+        self.sample_size = sample_size
+        self.additions = 0
+
+    def add(self, key):
+        """
+        Record one access of the key
+        :param key: hashable key
+        """
+        # counter of the key in each of the 4 rows, computed inline: this runs on every access
+        m0, m1, m2, m3 = self.MULTIPLIERS
+        h = hash(key) & MASK64
+        width = self.width
+        mask = self.mask
+        i0 = ((h * m0) & MASK64) >> 40 & mask
+        i1 = width + (((h * m1) & MASK64) >> 40 & mask)
+        i2 = 2 * width + (((h * m2) & MASK64) >> 40 & mask)
+        i3 = 3 * width + (((h * m3) & MASK64) >> 40 & mask)
+
+        table = self.table
+        top = self.MAX_COUNT
+        if table[i0] < top:
+            table[i0] += 1
+        if table[i1] < top:
+            table[i1] += 1
+        if table[i2] < top:
+            table[i2] += 1
+        if table[i3] < top:
+            table[i3] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = self.table.translate(HALF)
+            self.additions //= 2
+
+    def estimate(self, key):
+        """
+        Estimate number of recent accesses of the key
+        :param key: hashable key
+        :return: minimum of the key's counters
+        """
+        m0, m1, m2, m3 = self.MULTIPLIERS
+        h = hash(key) & MASK64
+        width = self.width
+        mask = self.mask
+        table = self.table
+        return min(table[((h * m0) & MASK64) >> 40 & mask],
+                   table[width + (((h * m1) & MASK64) >> 40 & mask)],
+                   table[2 * width + (((h * m2) & MASK64) >> 40 & mask)],
+                   table[3 * width + (((h * m3) & MASK64) >> 40 & mask)])
+
+
+class TinyLFUCache:
+    """ W-TinyLFU cache with the same read/write/hits/misses interface as Cache """
+
+    def __init__(self, size, window_percent=1, protected_percent=80):
+        """
+        Initialize cache
+        :param size: maximum number of values in the cache
+        :param window_percent: part of size (in %) used by the admission window
+        :param protected_percent: part of the main cache (in %) used by the protected segment
+        """
+        self.size = size
+        self.window_size = max(1, size * window_percent // 100)
+        main_size = size - self.window_size
+        self.protected_size = main_size * protected_percent // 100
+        self.main_size = main_size
+
+        self.lists = [Cache.Queue() for _ in range(3)]
+        self.lengths = [0, 0, 0]
+        self.where = dict()         # key -> (segment, node)
+        self.sketch = CountMinSketch(size, 10 * size)
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0          # values that left the cache: rejected candidates and replaced victims
+
+    def _push(self, segment, value):
+        """
+        Put value at the MRU end of a segment
+        :param segment: WINDOW, PROBATION or PROTECTED
+        :param value: value to append
+        """
+        self.where[value] = (segment, self.lists[segment].append(value))
+        self.lengths[segment] += 1
+
+    def _remove(self, value):
+        """
+        Remove value from its segment
+        :param value: value to remove
+        :return: segment the value was in
+        """
+        segment, node = self.where.pop(value)
+        self.lists[segment].pop(node)
+        self.lengths[segment] -= 1
+        return segment
+
+    def _pop_lru(self, segment):
+        """
+        Remove the LRU value of a segment
+        :param segment: WINDOW, PROBATION or PROTECTED
+        :return: removed value
+        """
+        value = self.lists[segment].pop_head()
+        del self.where[value]
+        self.lengths[segment] -= 1
+        return value
+
+    def _hit(self, value):
+        """
+        Record the access and check for a HIT, promoting the value on success
+        :param value: referenced value
+        :return: True if HIT, False if MISS
+        """
+        self.sketch.add(value)
+
+        if value not in self.where:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        segment = self._remove(value)
+
+        if segment == WINDOW:
+            self._push(WINDOW, value)
+        else:
+            # probation and protected hits both end in protected
+            self._push(PROTECTED, value)
+            if self.lengths[PROTECTED] > self.protected_size:
+                self._push(PROBATION, self._pop_lru(PROTECTED))
+
+        return True
+
+    def _admit(self, candidate):
+        """
+        Offer the value evicted from the window to the main cache
+        :param candidate: value pushed out of the window
+        """
+        if self.lengths[PROBATION] + self.lengths[PROTECTED] < self.main_size:
+            self._push(PROBATION, candidate)
+            return
+
+        # the main cache is full, either the candidate or the victim leaves
+        self.evictions += 1
+
+        if self.lengths[PROBATION] == 0:
+            self.rejected += 1
+            return
+
+        victim = self.lists[PROBATION].head.value
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            self._pop_lru(PROBATION)
+            self._push(PROBATION, candidate)
+        else:
+            self.rejected += 1
+
+    def write(self, value):
+        """
+        Write value to the cache
+        :param value: value to write
+        :return: True if HIT, False if MISS
+        """
+        if self._hit(value):
+            return True
+
+        self._push(WINDOW, value)
+        if self.lengths[WINDOW] > self.window_size:
+            self._admit(self._pop_lru(WINDOW))
+
+        return False
+
+    def read(self, value):
+        """
+        Read value from the cache; a MISS does not insert (the access is still counted in the sketch)
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+        return self._hit(value)
+
+    def get_elements(self):
+        """
+        Return cached values: window, probation and protected, each from LRU to MRU
+        :return: list of values
+        """
+        return [value for queue in self.lists for value in queue.to_list()]
+
+
+if __name__ == "__main__":
+    from arc import ARCCache
+    from traces import scan_keys, zipf_keys
+
+    workloads = (
+        ("Zipf 0.8", zipf_keys(500_000, 50_000, alpha=0.8)),
+        ("Zipf 1.0", zipf_keys(500_000, 50_000, alpha=1.0)),
+        ("Zipf 0.8 + scans", scan_keys(500_000, 50_000, alpha=0.8)),
+    )
+    engines = (("LRU", Cache), ("ARC", ARCCache), ("W-TinyLFU", TinyLFUCache))
+
+    print("Hit ratio (every access is a WRITE):")
+    for name, keys in workloads:
+        for size in (500, 5_000):
+            ratios = []
+            for _, cache_class in engines:
+                cache = cache_class(size)
+                write = cache.write
+                for key in keys:
+                    write(key)
+                ratios.append(cache.hits / len(keys))
+            columns = "  ".join(f"{engine} {ratio:.4f}" for (engine, _), ratio in zip(engines, ratios))
+            print(f"    {name:<18} size {size:<6} {columns}  gain over LRU {100 * (ratios[2] - ratios[0]):+.2f} pp")
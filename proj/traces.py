@@ -0,0 +1,313 @@
+'''@package docstring
+Trace formats (text commands, binary) and synthetic workloads for benchmarking the cache engines
+'''
+
+import random
+import itertools
+import mmap
+import struct
+import sys
+import weakref
+from array import array
+
+
+def zipf_keys(n_ops, n_keys, alpha=1.0, seed=0):
+    """
+    Generate keys drawn from a Zipf distribution (key 0 is the most popular)
+    :param n_ops: number of keys to generate
+    :param n_keys: number of distinct keys
+    :param alpha: skew of the distribution (bigger means hotter head)
+    :param seed: seed for the random generator
+    :return: list of integer keys
+    """
+
+    rng = random.Random(seed)
+    weights = [1.0 / (rank ** alpha) for rank in range(1, n_keys + 1)]
+    cum_weights = list(itertools.accumulate(weights))
+
+    return rng.choices(range(n_keys), cum_weights=cum_weights, k=n_ops)
+
+
+def uniform_keys(n_ops, n_keys, seed=0):
+    """
+    Generate uniformly distributed keys
+    :param n_ops: number of keys to generate
+    :param n_keys: number of distinct keys
+    :param seed: seed for the random generator
+    :return: list of integer keys
+    """
+
+    rng = random.Random(seed)
+    return [rng.randrange(n_keys) for _ in range(n_ops)]
+
+
+def scan_keys(n_ops, n_hot, alpha=1.0, scan_every=10_000, scan_length=5_000, seed=0):
+    """
+    Generate Zipf keys from a hot set interrupted by periodic sequential scans of never repeated keys
+    :param n_ops: number of keys to generate
+    :param n_hot: number of distinct hot keys
+    :param alpha: skew of the hot key distribution
+    :param scan_every: number of hot keys between two scans
+    :param scan_length: number of keys in one scan
+    :param seed: seed for the random generator
+    :return: list of integer keys (scan keys are >= n_hot)
+    """
+
+    hot = zipf_keys(n_ops, n_hot, alpha, seed)
+    keys = []
+    next_scan_key = n_hot
+    i = 0
+
+    while len(keys) < n_ops:
+        keys.extend(hot[i:i + scan_every])
+        i += scan_every
+        keys.extend(range(next_scan_key, next_scan_key + scan_length))
+        next_scan_key += scan_length
+
+    return keys[:n_ops]
+
+
+READ = 0
+WRITE = 1
+
+''' command names accepted by the CLI in proj.py '''
+COMMANDS = {"READ": READ, "R": READ, "WRITE": WRITE, "W": WRITE}
+
+
+def parse_command(line):
+    """
+    Parse one text command (READ <value>, R <value>, WRITE <value> or W <value>)
+    :param line: text of the command
+    :return: (op, value) tuple or None if the line is not a valid command
+    """
+
+    command = line.split()
+
+    if len(command) != 2:
+        return None
+
+    op = COMMANDS.get(command[0].upper())
+    if op is None:
+        return None
+
+    return op, command[1]
+
+
+def read_commands(lines):
+    """
+    Parse text commands, skipping empty and invalid lines
+    :param lines: iterable of text lines (e.g. an open file)
+    :return: generator of (op, value) tuples
+    """
+
+    for line in lines:
+        parsed = parse_command(line)
+        if parsed is not None:
+            yield parsed
+
+
+def zipf_ops(n_ops, n_keys, alpha=1.0, write_ratio=0.3, seed=0):
+    """
+    Generate a READ/WRITE workload with Zipf distributed keys
+    :param n_ops: number of operations
+    :param n_keys: number of distinct keys
+    :param alpha: skew of the key distribution
+    :param write_ratio: fraction of WRITE operations
+    :param seed: seed for the random generator
+    :return: list of (op, key) tuples
+    """
+
+    rng = random.Random(seed + 1)
+    keys = zipf_keys(n_ops, n_keys, alpha, seed)
+
+    return [(WRITE if rng.random() < write_ratio else READ, key) for key in keys]
+
+
+'''
+Binary trace format (all numbers little endian):
+
+    header      magic "LRUT", version (u16), record size (u16),
+                number of records (u64), dictionary offset (u64), number of keys (u64)
+    records     one u32 per command: key id << 1 | op
+    dictionary  for every key id in order: length (u32) + UTF-8 bytes of the value
+
+Records start right after the 32 byte header, so a reader can mmap the file and
+walk them in place. The dictionary is written after the records, which lets the
+converter stream the text trace in a single pass; the header points to it.
+'''
+
+MAGIC = b"LRUT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQQ")
+RECORD_SIZE = 4
+LENGTH = struct.Struct("<I")
+
+
+def convert_text_trace(text_path, binary_path, chunk=1 << 16):
+    """
+    Convert a text trace (CLI commands) to the binary format
+    :param text_path: path of the text trace
+    :param binary_path: path of the binary trace to create
+    :param chunk: number of records buffered before writing
+    :return: (number of records, number of distinct keys)
+    """
+
+    ids = dict()
+    n_records = 0
+    records = array("I")
+    little = sys.byteorder == "little"
+
+    with open(text_path) as text, open(binary_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, 0, 0))
+
+        for op, value in read_commands(text):
+            key = ids.get(value)
+            if key is None:
+                key = ids[value] = len(ids)
+            records.append(key << 1 | op)
+
+            if len(records) == chunk:
+                n_records += len(records)
+                if not little:
+                    records.byteswap()
+                records.tofile(out)
+                records = array("I")
+
+        n_records += len(records)
+        if not little:
+            records.byteswap()
+        records.tofile(out)
+
+        dictionary_offset = out.tell()
+        for value in ids:
+            encoded = value.encode("utf-8")
+            out.write(LENGTH.pack(len(encoded)))
+            out.write(encoded)
+
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, n_records, dictionary_offset, len(ids)))
+
+    return n_records, len(ids)
+
+
+class BinaryTrace:
+    """ Memory mapped reader of a binary trace; opening it reads only the header """
+
+    def __init__(self, path):
+        """
+        Open and map the trace
+        :param path: path of the binary trace
+        """
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, n_records, dictionary_offset, n_keys = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"{path} is not a binary trace")
+
+        self.n_records = n_records
+        self.n_keys = n_keys
+        self.dictionary_offset = dictionary_offset
+        self._keys = None
+        self._streams = weakref.WeakSet()   # ops() generators that may hold a view of the mapping
+
+    def __len__(self):
+        """
+        :return: number of records
+        """
+        return self.n_records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Unmap and close the file; unfinished ops() streams are closed first. If views returned by
+        records() are still alive, the mapping is unmapped when the last of them is released.
+        """
+        for stream in list(self._streams):
+            stream.close()
+
+        try:
+            self.map.close()
+        except BufferError:
+            # exported views keep the mmap object alive, it unmaps itself once they are gone
+            pass
+        self.file.close()
+
+    def records(self, start=0, stop=None):
+        """
+        Raw records without copying: u32 values key id << 1 | op
+        :param start: index of the first record
+        :param stop: index after the last record (default: end of trace)
+        :return: memoryview of unsigned ints (a copy on big endian machines)
+        """
+        if stop is None:
+            stop = self.n_records
+
+        begin = HEADER.size + start * RECORD_SIZE
+        end = HEADER.size + stop * RECORD_SIZE
+        view = memoryview(self.map)[begin:end]
+
+        if sys.byteorder == "little":
+            return view.cast("I")
+
+        records = array("I", view.tobytes())
+        records.byteswap()
+        return memoryview(records)
+
+    def ops(self, decode=False, chunk=1 << 20):
+        """
+        Stream operations, walking the mapping chunk by chunk
+        :param decode: yield original text values instead of interned integer ids
+        :param chunk: number of records per chunk
+        :return: generator of (op, key) tuples
+        """
+        stream = self._ops(self.keys() if decode else None, chunk)
+        self._streams.add(stream)
+        return stream
+
+    def _ops(self, keys, chunk):
+        """
+        Generator behind ops(); the view of the current chunk is released however the stream ends
+        """
+        for start in range(0, self.n_records, chunk):
+            records = self.records(start, min(start + chunk, self.n_records))
+            try:
+                if keys is None:
+                    for record in records:
+                        yield record & 1, record >> 1
+                else:
+                    for record in records:
+                        yield record & 1, keys[record >> 1]
+            finally:
+                records.release()
+
+    def keys(self):
+        """
+        Load the key dictionary (only done on first use)
+        :return: list of values indexed by key id
+        """
+        if self._keys is None:
+            keys = []
+            offset = self.dictionary_offset
+            for _ in range(self.n_keys):
+                (length,) = LENGTH.unpack_from(self.map, offset)
+                offset += LENGTH.size
+                keys.append(self.map[offset:offset + length].decode("utf-8"))
+                offset += length
+            self._keys = keys
+        return self._keys
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python traces.py <text trace> <binary trace>")
+        sys.exit(1)
+
+    n_records, n_keys = convert_text_trace(sys.argv[1], sys.argv[2])
+    print(f"Converted {n_records} commands with {n_keys} distinct values.")
@@ -0,0 +1,282 @@
+'''@package docstring
+LRU cache with time to live of entries, expired by a hierarchical timer wheel
+'''
+
+import time
+
+from proj import Cache
+
+
+class TimerWheel:
+    """ Hierarchical timer wheel with at most one timer per key: O(1) scheduling and cancelling, expired timers collected in amortized O(1) """
+
+    def __init__(self, bits=6, levels=4):
+        """
+        Initialize empty wheel; level k has 2**bits slots, each covering 2**(bits*k) ticks.
+        Timers further away than the last level are parked in its furthest slot and cascaded later.
+        :param bits: log2 of the number of slots per level
+        :param levels: number of levels, at least 2 (parked timers need a higher level to cascade from)
+        """
+        if levels < 2:
+            raise ValueError(f"TimerWheel needs at least 2 levels, got {levels}")
+
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.levels = [[dict() for _ in range(1 << bits)] for _ in range(levels)]
+        self.slots = dict()     # key -> slot (dict key -> tick) holding its timer
+        self.now = 0
+        self.count = 0
+
+    def schedule(self, key, tick):
+        """
+        Schedule the timer of a key, replacing the timer it already has
+        :param key: identifier returned when the timer fires
+        :param tick: tick at which the timer fires (timers in the past fire on the next advance)
+        """
+        self.cancel(key)
+        self.count += 1
+        self._place(key, max(tick, self.now + 1))
+
+    def cancel(self, key):
+        """
+        Remove the timer of a key if it has one
+        :param key: identifier of the timer
+        """
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            del slot[key]
+            self.count -= 1
+
+    def _place(self, key, tick):
+        """
+        Put the timer into the slot matching its distance from now
+        :param key: identifier of the timer
+        :param tick: tick at which the timer fires
+        """
+        bits = self.bits
+        delta = tick - self.now
+        last = len(self.levels) - 1
+
+        level = 0
+        while level < last and delta >> (bits * (level + 1)):
+            level += 1
+
+        if delta >> (bits * (level + 1)):
+            # too far for the wheel, park in the slot just before the current one on the last level
+            slot = ((self.now >> (bits * level)) - 1) & self.mask
+        else:
+            slot = (tick >> (bits * level)) & self.mask
+
+        slot = self.levels[level][slot]
+        slot[key] = tick
+        self.slots[key] = slot
+
+    def _next_event(self, limit):
+        """
+        Find the first tick after now at which a level-0 slot fires or a non-empty slot of a higher level cascades
+        :param limit: ticks after limit are not of interest
+        :return: the tick, or limit + 1 if nothing happens until limit
+        """
+        bits = self.bits
+        mask = self.mask
+        best = limit + 1
+
+        for level, slots in enumerate(self.levels):
+            shift = bits * level
+            unit = 1 << shift
+            tick = ((self.now >> shift) + 1) << shift     # first slot boundary of this level after now
+
+            # one rotation of the level at most, stop once past the best event found so far
+            for _ in range(1 << bits):
+                if tick >= best:
+                    break
+                if slots[(tick >> shift) & mask]:
+                    best = tick
+                    break
+                tick += unit
+
+        return best
+
+    def advance(self, tick):
+        """
+        Move the wheel to tick and collect all timers that fired; empty ticks are skipped,
+        so the cost depends on the number of timers, not on the time elapsed
+        :param tick: new current tick
+        :return: list of (key, tick) of the fired timers
+        """
+        fired = []
+        bits = self.bits
+        mask = self.mask
+
+        while self.now < tick:
+            if self.count == 0:
+                # nothing scheduled, jump straight to the target
+                self.now = tick
+                break
+
+            now = self._next_event(tick)
+            if now > tick:
+                self.now = tick
+                break
+            self.now = now
+
+            # cascade the higher levels whose slot boundary we just crossed
+            level = 1
+            while level < len(self.levels) and (now & ((1 << (bits * level)) - 1)) == 0:
+                slot = self.levels[level][(now >> (bits * level)) & mask]
+                timers = list(slot.items())
+                slot.clear()
+                for key, due in timers:
+                    if due > now:
+                        self._place(key, due)
+                    else:
+                        current = self.levels[0][now & mask]
+                        current[key] = due
+                        self.slots[key] = current
+                level += 1
+
+            slot = self.levels[0][now & mask]
+            if slot:
+                self.count -= len(slot)
+                for key in slot:
+                    del self.slots[key]
+                fired.extend(slot.items())
+                slot.clear()
+
+        return fired
+
+
+class TTLCache(Cache):
+    """ LRU cache whose entries expire after a time to live; expired entries are gone, so reading them is a MISS """
+
+    def __init__(self, size, default_ttl=None, resolution=0.1, clock=time.monotonic):
+        """
+        Initialize cache
+        :param size: maximum size of the cache
+        :param default_ttl: time to live (seconds) of entries written without ttl, None for no expiry
+        :param resolution: length of one timer wheel tick in seconds
+        :param clock: function returning current time in seconds
+        """
+        super().__init__(size)
+        self.default_ttl = default_ttl
+        self.resolution = resolution
+        self.clock = clock
+        self.wheel = TimerWheel()
+        self.wheel.now = self._tick()
+        self.deadlines = dict()
+        self.expirations = 0
+
+    def _tick(self):
+        """
+        :return: current time in ticks
+        """
+        return int(self.clock() / self.resolution)
+
+    def expire(self):
+        """
+        Advance the timer wheel to now and remove every entry whose time to live is over
+        :return: number of removed entries
+        """
+        removed = 0
+
+        for value, tick in self.wheel.advance(self._tick()):
+            # every cached value has at most one timer, cancelled when the value leaves the cache
+            if self.deadlines.get(value) == tick:
+                self.discard(value)
+                removed += 1
+
+        self.expirations += removed
+        return removed
+
+    def write(self, value, ttl=None):
+        """
+        Write value to the cache, (re)starting its time to live
+        :param value: value to write
+        :param ttl: time to live in seconds (default_ttl if None)
+        :return: True if HIT, False if MISS
+        """
+        self.expire()
+        hit = super().write(value)
+
+        if ttl is None:
+            ttl = self.default_ttl
+
+        if ttl is None:
+            self.deadlines.pop(value, None)
+            self.wheel.cancel(value)
+        else:
+            tick = self.wheel.now + max(1, -int(-ttl // self.resolution))
+            self.deadlines[value] = tick
+            self.wheel.schedule(value, tick)
+
+        return hit
+
+    def read(self, value):
+        """
+        Read value from the cache; an expired value is a MISS
+        :param value: value to read
+        :return: True if HIT, False if MISS
+        """
+        self.expire()
+        return super().read(value)
+
+    def evict(self):
+        """
+        Remove the least recently used value and its timer
+        :return: removed value
+        """
+        oldest = super().evict()
+        self.deadlines.pop(oldest, None)
+        self.wheel.cancel(oldest)
+        return oldest
+
+    def discard(self, value):
+        """
+        Remove a value and its timer
+        :param value: value to remove, a value that is not cached is ignored
+        :return: True if the value was cached
+        """
+        if not super().discard(value):
+            return False
+
+        self.deadlines.pop(value, None)
+        self.wheel.cancel(value)
+        return True
+
+    def reset(self):
+        """
+        Remove all values, their timers and reset counters
+        """
+        super().reset()
+        self.wheel = TimerWheel()
+        self.wheel.now = self._tick()
+        self.deadlines = dict()
+        self.expirations = 0
+
+    def _payloads(self, keys):
+        """
+        Remaining time to live of the entries, saved with the snapshot
+        :param keys: cached values from LRU to MRU
+        :return: list of seconds left (None for entries without expiry) in the order of keys
+        """
+        now = self._tick()
+        deadlines = self.deadlines
+        return [None if key not in deadlines else max(0, deadlines[key] - now) * self.resolution
+                for key in keys]
+
+    def _restore(self, keys, payloads):
+        """
+        Fill an empty cache from a snapshot, restarting the saved remaining time to live of every entry
+        :param keys: values from LRU to MRU
+        :param payloads: seconds left in the order of keys, or None (no expiry)
+        """
+        super()._restore(keys, payloads)
+        if payloads is None:
+            return
+
+        now = self.wheel.now
+        for key, ttl in zip(keys, payloads):
+            if ttl is not None:
+                tick = now + max(1, -int(-ttl // self.resolution))
+                self.deadlines[key] = tick
+                self.wheel.schedule(key, tick)
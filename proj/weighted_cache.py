@@ -0,0 +1,167 @@
+'''@package docstring
+LRU cache bounded by the total weight (bytes) of its entries instead of their number
+'''
+
+import sys
+
+from proj import Cache
+
+
+class WeightedCache(Cache):
+    """ LRU cache whose size is a capacity in bytes; write evicts as many LRU entries as needed to fit the new one """
+
+    def __init__(self, size, weigher=sys.getsizeof):
+        """
+        Initialize cache
+        :param size: capacity of the cache in bytes
+        :param weigher: function returning weight of a value (used when write gets no weight)
+        """
+        super().__init__(size)
+        self.weigher = weigher
+        self.weights = dict()
+        self.weight = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def write(self, value, weight=None):
+        """
+        Write value to the cache; values heavier than the whole capacity are rejected
+        :param value: value to write
+        :param weight: weight of the value in bytes (weigher(value) if None)
+        :return: True if HIT, False if MISS
+        """
+        if weight is None:
+            weight = self.weigher(value)
+
+        if value in self.cache:
+            # HIT case - update position and weight, an entry grown past the capacity is dropped
+            self.hits += 1
+
+            if weight > self.size:
+                self.rejected += 1
+                self.discard(value)
+                return True
+
+            old_node = self.cache[value]
+            self.queue.pop(old_node)
+            self.weight -= self.weights.pop(value)
+            del self.cache[value]
+
+            self._insert(value, weight)
+            return True
+
+        # MISS case
+
+        self.misses += 1
+
+        if weight > self.size:
+            self.rejected += 1
+            return False
+
+        self._insert(value, weight)
+        return False
+
+    def _insert(self, value, weight):
+        """
+        Make room for weight bytes and put value at the newest position
+        :param value: value to insert
+        :param weight: weight of the value
+        """
+        while self.weight + weight > self.size:
+            self.evict()
+
+        self.cache[value] = self.queue.append(value)
+        self.weights[value] = weight
+        self.weight += weight
+
+    def resize(self, new_size):
+        """
+        Change capacity of the cache keeping its content; shrinking evicts LRU entries until the rest fits
+        :param new_size: new capacity in bytes
+        :return: list of evicted values from LRU to MRU
+        """
+        if new_size < 1:
+            raise ValueError(f"Cache size must be >= 1, got {new_size}")
+
+        self.size = new_size
+
+        evicted = []
+        while self.weight > self.size:
+            evicted.append(self.evict())
+
+        return evicted
+
+    def evict(self):
+        """
+        Remove the least recently used value
+        :return: removed value
+        """
+        oldest = super().evict()
+        self.weight -= self.weights.pop(oldest)
+        self.evictions += 1
+        return oldest
+
+    def discard(self, value):
+        """
+        Remove a value and its weight
+        :param value: value to remove, a value that is not cached is ignored
+        :return: True if the value was cached
+        """
+        if not super().discard(value):
+            return False
+
+        self.weight -= self.weights.pop(value)
+        return True
+
+    def reset(self):
+        """
+        Remove all values and reset counters
+        """
+        super().reset()
+        self.weights = dict()
+        self.weight = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def _payloads(self, keys):
+        """
+        Weights saved with the snapshot
+        :param keys: cached values from LRU to MRU
+        :return: list of weights in the order of keys
+        """
+        weights = self.weights
+        return [weights[key] for key in keys]
+
+    def _restore(self, keys, payloads):
+        """
+        Fill an empty cache from a snapshot, evicting LRU entries if they do not fit a smaller capacity
+        :param keys: values from LRU to MRU
+        :param payloads: weights in the order of keys, or None (weigher is used)
+        """
+        super()._restore(keys, payloads)
+        if payloads is None:
+            payloads = [self.weigher(key) for key in keys]
+        self.weights = dict(zip(keys, payloads))
+        self.weight = sum(payloads)
+
+        while self.weight > self.size:
+            self.evict()
+
+
+if __name__ == "__main__":
+    import random
+    from traces import zipf_keys
+
+    rng = random.Random(0)
+    sizes = dict()
+    cache = WeightedCache(64 * 1024 * 1024)
+
+    for key in zipf_keys(200_000, 20_000, alpha=0.9):
+        if key not in sizes:
+            # object sizes from 100 B to 10 MB, log-uniform
+            sizes[key] = int(100 * 10 ** rng.uniform(0, 5))
+        cache.write(key, sizes[key])
+
+    print(f"HITS: {cache.hits}, MISSES: {cache.misses}")
+    print(f"Weight: {cache.weight} / {cache.size} B in {len(cache.cache)} entries, "
+          f"evictions: {cache.evictions}, rejected: {cache.rejected}")